@@ -0,0 +1,174 @@
+# Local stand-in for a wickspin match page, for exercising the scrapers without the real site.
+#
+#   python EXTRA/fake_feed_server.py --port 8765
+#
+# GET /                     page with the same exchange / fancy / premium markup the scrapers read,
+#                           kept up to date by its own WebSocket client (so DOM and network modes both work)
+# WS  /feed                 pushes runner / fancy / sportsbook payloads every --interval seconds
+# GET /api/markets/<event>  latest combined payload as JSON (keep-alive), for the HTTP replay poller
+#
+# Point a scraper at http://127.0.0.1:8765/#/full-market/4-1?marketId=1.1
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from websocket_lite import read_request, is_upgrade, accept, send_text, wait_closed
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Fake wickspin</title></head>
+<body>
+<div id="exchange"></div>
+<div id="fancy"></div>
+<div id="premium"></div>
+<script>
+const esc = (s) => String(s).replace(/[&<>]/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;"}[c]));
+const fmt = (v) => (v === null || v === undefined ? "" : String(v));
+const vol = (v) => (v === null || v === undefined ? "" : Number(v).toLocaleString("en-US", {minimumFractionDigits: 2, maximumFractionDigits: 2}));
+
+function renderRunners(runners) {
+    document.getElementById("exchange").innerHTML = runners.map((r) => {
+        const b = r.back[0] || {}, l = r.lay[0] || {};
+        return `<div class="exchange_panel_line"><h2>${esc(r.runnerName)}</h2>` +
+            `<div title="BACK"><h3>${fmt(b.price)}</h3><p>${vol(b.size)}</p></div>` +
+            `<div title="LAY"><h3>${fmt(l.price)}</h3><p>${vol(l.size)}</p></div></div>`;
+    }).join("");
+}
+
+function renderFancy(fancy) {
+    document.getElementById("fancy").innerHTML = fancy.map((f) => {
+        const status = f.status === "SUSPEND" ? `<div data-testid="fancybet-market-status">SUSPEND</div>` : "";
+        return `<div class="mb-1px px-1 relative"><h2>${esc(f.name)}</h2>${status}` +
+            `<div title="NO"><h3>${fmt(f.noRate)}</h3><p>${fmt(f.noValue)}</p></div>` +
+            `<div title="YES"><h3>${fmt(f.yesRate)}</h3><p>${fmt(f.yesValue)}</p></div></div>`;
+    }).join("");
+}
+
+function renderMarkets(markets) {
+    document.getElementById("premium").innerHTML = markets.map((m) => {
+        const overlay = m.status === "SUSPENDED" ? "" : "display: none;";
+        return `<div class="mb-1"><div class="relative py-2 pl-0"><span class="text-13 font-bold">${esc(m.marketName)}</span>` +
+            `<i class="icon-arrow-down-sencodary text-12 mr-3 justify-self-end text-black transition-transform origin-center duration-300 transform rotate-180"></i></div>` +
+            `<div class="grid grid-cols-2">` + m.selections.map((s) =>
+                `<div title="back"><p class="text-9">${esc(s.name)}</p><p class="text-15">${fmt(s.odds)}</p></div>`).join("") +
+            `</div><div class="absolute w-full h-full" style="${overlay}"></div></div>`;
+    }).join("");
+}
+
+const socket = new WebSocket(`ws://${location.host}/feed`);
+socket.onmessage = (event) => {
+    const payload = JSON.parse(event.data);
+    if (payload.data && payload.data.runners) renderRunners(payload.data.runners);
+    if (payload.fancy) renderFancy(payload.fancy);
+    if (payload.markets) renderMarkets(payload.markets);
+};
+</script>
+</body></html>
+"""
+
+
+# Random-walk market state shaped like the payloads network_feed.map_payload recognises
+class FakeMarket:
+    def __init__(self):
+        self.runners = {"Home XI": 1.85, "Away XI": 2.10}
+        self.fancy = {"6 over runs": 48, "10 over runs": 78, "Fall of 1st wkt": 22}
+        self.suspended = set()
+        self.markets = {"Match Result": {"Home": 2.4, "Draw": 3.3, "Away": 2.9},
+                        "Total Goals Over/Under 2.5": {"Over": 1.9, "Under": 1.9}}
+
+    def tick(self):
+        for name, price in self.runners.items():
+            self.runners[name] = round(max(1.01, price + random.choice((-0.02, 0, 0.02))), 2)
+        for name, line in self.fancy.items():
+            self.fancy[name] = line + random.choice((-1, 0, 0, 1))
+        self.suspended = {name for name in self.fancy if random.random() < 0.1}
+        for selections in self.markets.values():
+            for name, odds in selections.items():
+                selections[name] = round(max(1.01, odds + random.choice((-0.05, 0, 0.05))), 2)
+
+    def runners_payload(self):
+        return {"data": {"marketId": "1.1", "runners": [
+            {"runnerName": name, "back": [{"price": price, "size": random.uniform(100, 50000)}],
+             "lay": [{"price": round(price + 0.02, 2), "size": random.uniform(100, 50000)}]}
+            for name, price in self.runners.items()]}}
+
+    def fancy_payload(self):
+        return {"fancy": [
+            {"name": name, "status": "SUSPEND" if name in self.suspended else "Active",
+             "noRate": line, "noValue": 100, "yesRate": line + 1, "yesValue": 100}
+            for name, line in self.fancy.items()]}
+
+    def markets_payload(self):
+        return {"markets": [
+            {"marketName": title, "status": "ACTIVE",
+             "selections": [{"name": name, "odds": odds} for name, odds in selections.items()]}
+            for title, selections in self.markets.items()]}
+
+    def combined(self):
+        return {"timestamp": time.time(), **self.runners_payload(), **self.fancy_payload(), **self.markets_payload()}
+
+
+async def serve(host, port, interval):
+    market = FakeMarket()
+    sockets = set()
+
+    async def ticker():
+        while True:
+            market.tick()
+            for payload in (market.runners_payload(), market.fancy_payload(), market.markets_payload()):
+                text = json.dumps(payload)
+                for writer in list(sockets):
+                    try:
+                        await send_text(writer, text)
+                    except ConnectionError:
+                        sockets.discard(writer)
+            await asyncio.sleep(interval)
+
+    def respond(writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+        )
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                method, path, headers = await read_request(reader)
+                if method is None:
+                    break
+                if path == "/feed" and is_upgrade(headers):
+                    await accept(writer, headers)
+                    sockets.add(writer)
+                    await wait_closed(reader, writer)
+                    sockets.discard(writer)
+                    break
+                if path.startswith("/api/markets/"):
+                    respond(writer, "200 OK", "application/json", json.dumps(market.combined()).encode())
+                elif path.split("?")[0] == "/":
+                    respond(writer, "200 OK", "text/html; charset=utf-8", PAGE.encode())
+                else:
+                    respond(writer, "404 Not Found", "text/plain", b"not found")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"🧪 Fake feed on http://{host}:{port}/#/full-market/4-1?marketId=1.1")
+    async with server:
+        await asyncio.gather(server.serve_forever(), ticker())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the wickspin odds feed")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.interval))
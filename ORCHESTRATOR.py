@@ -0,0 +1,211 @@
+import queue
+import threading
+import time
+from pathlib import Path
+
+from WikSpinLiv_2 import scrape_wickspin_live, write_data_file
+from WikSpinLiv_2_Premium import scrape_premium_data, write_premium_file
+from snapshot_writer import write_if_changed
+from tab_multiplexer import TabMultiplexer
+from driver_pool import DriverPool
+from match_tiers import TIER_INTERVALS, market_id_of
+from snapshot_server import start_in_background as start_snapshot_server
+from match_lifecycle import MatchLifecycle
+from market_subscriptions import subscription_for
+from scrape_metrics import inc, track_runtime
+from discovery_queue import subscribe, start_file_watcher
+from IN_PLAY import now, load_matches_from_json, sanitize_filename, create_driver
+import IN_PLAY_MATCHES
+import TODAY_MATCHES
+import TOMMOROW_MATCHES
+
+# One process for every discovery feed. A match listed by several feeds (Today + In-Play) is scraped
+# once and its snapshot is written into each feed's *_Scrapped/<sport>/ folder.
+# Order is priority: the first feed listing a match gets the direct write, the rest get copies.
+FEEDS = [
+    ("IN_PLAY", IN_PLAY_MATCHES.scrape_data, "IN_PLAY_MATCHES.json", "IN_PLAY_Scrapped"),
+    ("TODAY", TODAY_MATCHES.scrape_data, "TODAY_MATCHES.json", "TODAY_Scrapped"),
+    ("TOMMOROW", TOMMOROW_MATCHES.scrape_data, "TOMMOROW_MATCHES.json", "TOMMOROW_Scrapped"),
+]
+FEED_ORDER = [feed for feed, _, _, _ in FEEDS]
+FEED_DIRS = {feed: out_dir for feed, _, _, out_dir in FEEDS}
+
+MAX_BROWSERS = 5
+TABS_PER_BROWSER = 10
+DISCOVERY_INTERVAL = 120
+WATCH_INTERVAL = 60
+SNAPSHOT_PORT = 8790  # latest odds of every match over HTTP/WebSocket, see snapshot_server.py
+
+
+# Every match currently listed by any feed, keyed by market id
+class MatchRegistry:
+    def __init__(self):
+        self.matches = {}
+        self.listed = set()  # market ids the last refresh found in any feed
+        self.lock = threading.Lock()
+
+    # Merge every feed's listing (pushed by discovery, else read from its file); returns the entries new to the registry
+    def refresh(self, listings=None):
+        listings = listings or {}
+        listed = {}
+        for feed, _, json_file, _ in FEEDS:
+            listing = listings[feed] if feed in listings else load_matches_from_json(json_file)
+            for sport_entry in listing or []:
+                sport = sport_entry.get("sport", "Unknown")
+                for match in sport_entry.get("matches", []):
+                    if not (match.get("fancy_bet", False) or match.get("sportsbook", False)):
+                        continue
+                    entry = listed.setdefault(market_id_of(match.get("url")), {"sport": sport, "match": match, "feeds": []})
+                    entry["feeds"].append(feed)
+
+        added = []
+        with self.lock:
+            for market_id, seen in listed.items():
+                entry = self.matches.get(market_id)
+                if entry is None:
+                    entry = self.matches[market_id] = {"market_id": market_id, "sport": seen["sport"], "match": seen["match"], "feeds": []}
+                    added.append(entry)
+                # Feed membership moves over the day (Tomorrow → Today → In-Play); cycles read it live
+                entry["feeds"] = sorted(set(seen["feeds"]), key=FEED_ORDER.index)
+            self.listed = set(listed)
+        return added
+
+    def forget(self, market_id):
+        with self.lock:
+            self.matches.pop(market_id, None)
+
+
+def output_paths(entry, feed, create=True):
+    sport_dir = Path(FEED_DIRS[feed]) / sanitize_filename(entry["sport"])
+    if create:
+        sport_dir.mkdir(parents=True, exist_ok=True)
+    match_name = sanitize_filename(entry["match"].get("match", "unknown_match"))
+    return sport_dir / f"{match_name}_wickspin.json", sport_dir / f"{match_name}_premium.json"
+
+
+def make_match_cycle(entry):
+    match = entry["match"]
+    match_name = sanitize_filename(match.get("match", "unknown_match"))
+    url = match.get("url")
+    fancy_bet = match.get("fancy_bet", False)
+    sportsbook = match.get("sportsbook", False)
+
+    print(f"[{now()}] 🔄 Starting continuous scrape for: {match_name} | Feeds: {', '.join(entry['feeds'])} | Fancy Bet: {fancy_bet}")
+
+    def scrape_cycle(driver):
+        scraped = {}  # what this cycle read; the multiplexer paces the match on it
+        feeds = entry["feeds"] or FEED_ORDER[:1]
+        wickspin_output, premium_output = output_paths(entry, feeds[0])
+        # Other feeds listing the match get the same snapshot; its history and columns live with the primary file
+        copies = [output_paths(entry, feed) for feed in feeds[1:]]
+        subscription = subscription_for(entry["sport"], match.get("match"))  # re-resolved so spec edits apply live
+
+        if fancy_bet:
+            scraped["wickspin"] = scrape_wickspin_live(
+                main_url=url,
+                output_file=str(wickspin_output),
+                update_interval=0.5,
+                headless=True,
+                run_forever=False,
+                driver=driver,
+                subscription=subscription
+            )
+            for copy_wickspin, _ in copies:
+                write_if_changed(str(copy_wickspin), scraped["wickspin"], write_data_file)
+        if sportsbook:
+            scraped["premium"] = scrape_premium_data(
+                loop_interval=0.5,
+                main_url=url,
+                output_file=str(premium_output),
+                run_forever=False,
+                driver=driver,
+                headless=True,
+                subscription=subscription
+            )
+            for _, copy_premium in copies:
+                write_if_changed(str(copy_premium), scraped["premium"], write_premium_file)
+        print(f"[{now()}] ✅ Scrape cycle complete: {match_name}")
+        return scraped
+
+    # Released when the match is retired
+    scrape_cycle.output_files = tuple(str(path) for feed in FEED_ORDER for path in output_paths(entry, feed, create=False))
+    return scrape_cycle
+
+
+if __name__ == "__main__":
+    threads = []
+    registry = MatchRegistry()
+    # One browser budget for everything: tab hosts + one slot the discovery feeds take turns on
+    driver_pool = DriverPool(create_driver, max_drivers=MAX_BROWSERS + 1)
+    discovery_slot = threading.Lock()  # held for a whole discovery pass, so the feeds never lease more than that slot
+    multiplexer = TabMultiplexer(driver_pool, tabs_per_browser=TABS_PER_BROWSER, max_browsers=MAX_BROWSERS)
+    initial_scrape_done = threading.Event()
+    lifecycle = MatchLifecycle(multiplexer, audit_file="ORCHESTRATOR_lifecycle.ndjson")
+    start_snapshot_server(port=SNAPSHOT_PORT)  # also serves /metrics
+    track_runtime(driver_pool, multiplexer)
+    # Discovery below pushes each listing here; the file watchers cover discovery scripts run on their own
+    listing_updates = subscribe()
+    for feed, _, json_file, _ in FEEDS:
+        start_file_watcher(feed, json_file)
+
+    def discovery_loop(feed, scrape_data):
+        while True:
+            print(f"[{now()}] ⏳ {feed}: starting discovery...")
+            try:
+                with discovery_slot:
+                    scrape_data(pool=driver_pool)
+                print(f"[{now()}] ✅ {feed}: discovery completed.")
+            except Exception as e:
+                print(f"[{now()}] ❌ {feed}: discovery error: {e}")
+                inc("scrape_errors_total", stage="discovery")
+            initial_scrape_done.set()
+            time.sleep(DISCOVERY_INTERVAL)
+
+    def watcher():
+        initial_scrape_done.wait()
+        listings = {}
+        while True:
+            try:
+                added = registry.refresh(listings)
+                for entry in added:
+                    entry["tier"] = entry["feeds"][0]
+                    print(f"[{now()}] ➕ New match: {entry['match'].get('match')} ({entry['market_id']}) in {entry['sport']}, {entry['tier']} tier")
+                    multiplexer.add_match(entry["market_id"], make_match_cycle(entry), TIER_INTERVALS[entry["tier"]])
+                    lifecycle.started(entry["market_id"], entry["match"].get("match"))
+                # The highest-priority feed listing a match sets its poll rate (Tomorrow → Today → In-Play)
+                for entry in list(registry.matches.values()):
+                    tier = entry["feeds"][0] if entry["feeds"] else entry.get("tier")
+                    if tier and tier != entry.get("tier"):
+                        entry["tier"] = tier
+                        multiplexer.set_interval(entry["market_id"], TIER_INTERVALS[tier])
+                        print(f"[{now()}] ⇅ {entry['match'].get('match')} moved to the {tier} tier")
+                # Matches no feed lists any more lose their tab after a grace period
+                for market_id in lifecycle.reconcile(registry.listed):
+                    registry.forget(market_id)
+                print(f"[{now()}] 👀 {len(registry.matches)} unique matches across feeds, {len(added)} new")
+            except Exception as e:
+                print(f"[{now()}] ❌ Watcher error: {e}")
+
+            # Wake as soon as any feed publishes; with nothing pushed for a while, re-read every file
+            try:
+                feed, listing = listing_updates.get(timeout=WATCH_INTERVAL)
+                listings[feed] = listing
+            except queue.Empty:
+                listings = {}
+
+    for feed, scrape_data, _, _ in FEEDS:
+        thread = threading.Thread(target=discovery_loop, args=(feed, scrape_data), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    watcher_thread = threading.Thread(target=watcher, daemon=True)
+    watcher_thread.start()
+    threads.append(watcher_thread)
+
+    print(f"[{now()}] ✅ Orchestrator started for feeds: {', '.join(FEED_ORDER)}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting... All threads will stop automatically.")
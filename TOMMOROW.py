@@ -1,6 +1,6 @@
+import queue
 import threading
 import time
-import json
 from datetime import datetime
 from pathlib import Path
 import orjson
@@ -10,6 +10,13 @@ from selenium.webdriver.chrome.options import Options
 
 from WikSpinLiv_2 import scrape_wickspin_live
 from WikSpinLiv_2_Premium import scrape_premium_data
+from tab_multiplexer import TabMultiplexer
+from driver_pool import DriverPool
+from match_tiers import TIER_INTERVALS, market_id_of, in_play_market_ids, tier_for
+from match_lifecycle import MatchLifecycle
+from market_subscriptions import subscription_for
+from scrape_metrics import inc, track_runtime, start_metrics_server, METRICS_PORTS
+from discovery_queue import subscribe, start_file_watcher
 from TOMMOROW_MATCHES import scrape_data  # Update this to your actual module if needed
 
 
@@ -45,11 +52,15 @@ def create_driver():
     options.add_argument('--enable-unsafe-swiftshader')
     options.add_argument('--window-size=1920,1080')
     options.add_argument('--log-level=3')
+    # Match pages live in background tabs now; keep their timers and rendering at full speed
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    options.add_argument('--disable-renderer-backgrounding')
     return webdriver.Chrome(options=options)
 
 
-# Thread function for scraping a match continuously
-def process_match_forever(sport, match):
+# Build the per-match scrape cycle; the multiplexer runs it on the match's own tab
+def make_match_cycle(sport, match):
     match_name = sanitize_filename(match.get("match", "unknown_match"))
     url = match.get("url")
     fancy_bet = match.get("fancy_bet", False)
@@ -62,79 +73,84 @@ def process_match_forever(sport, match):
 
     print(f"[{now()}] 🔄 Starting continuous scrape for: {match_name} | Sport: {sport} | Fancy Bet: {fancy_bet}")
 
-    driver = create_driver()
-
-    try:
-        while True:
-            try:
-                if fancy_bet:
-                    scrape_wickspin_live(
-                        main_url=url,
-                        output_file=str(wickspin_output),
-                        update_interval=0.5,
-                        headless=True,
-                        run_forever=False,
-                        driver=driver
-                    )
-                    print(f"[{now()}] ✅ Wickspin scrape cycle complete: {match_name}")
-                if sportsbook :
-                    scrape_premium_data(
-                        loop_interval=0.5,
-                        main_url=url,
-                        output_file=str(premium_output),
-                        run_forever=False,
-                        driver=driver,
-                        headless=True
-                    )
-                    print(f"[{now()}] ✅ Premium scrape cycle complete: {match_name}")
-            except Exception as e:
-                print(f"[{now()}] ❌ Error scraping {match_name}: {e}")
-                # Restart driver if error
-                try:
-                    driver.quit()
-                except Exception:
-                    pass
-                driver = create_driver()
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
-        print(f"[{now()}] 🛑 Driver quit for match: {match_name}")
-
-
-# Watcher thread to monitor the JSON file for new matches
-def watch_for_new_matches(json_file, existing_matches_set, check_interval=60):  ## can make it 1000
+    def scrape_cycle(driver):
+        scraped = {}  # what this cycle read; the multiplexer paces the match on it
+        subscription = subscription_for(sport, match.get("match"))  # re-resolved so spec edits apply live
+        if fancy_bet:
+            scraped["wickspin"] = scrape_wickspin_live(
+                main_url=url,
+                output_file=str(wickspin_output),
+                update_interval=0.5,
+                headless=True,
+                run_forever=False,
+                driver=driver,
+                subscription=subscription
+            )
+            print(f"[{now()}] ✅ Wickspin scrape cycle complete: {match_name}")
+        if sportsbook :
+            scraped["premium"] = scrape_premium_data(
+                loop_interval=0.5,
+                main_url=url,
+                output_file=str(premium_output),
+                run_forever=False,
+                driver=driver,
+                headless=True,
+                subscription=subscription
+            )
+            print(f"[{now()}] ✅ Premium scrape cycle complete: {match_name}")
+        return scraped
+
+    scrape_cycle.output_files = (str(wickspin_output), str(premium_output))  # released when the match is retired
+    return scrape_cycle
+
+
+# One pass over a discovery listing: start new matches, re-tier known ones, retire the vanished
+def apply_listing(data, existing_matches_set):
+    in_play_ids = in_play_market_ids()
+    listed = set()
+    added = 0
+    for sport_entry in data:
+        sport = sport_entry.get("sport", "Unknown")
+        matches = sport_entry.get("matches", [])
+        for match in matches:
+            if match.get("fancy_bet", False) or match.get("sportsbook", False):
+                match_id = f"{sport}|{match.get('match', '')}|{match.get('url', '')}"
+                listed.add(match_id)
+                # Poll rate follows the tier; a match showing up in-play is promoted on the next listing
+                tier = tier_for(market_id_of(match.get('url')), "TOMMOROW", in_play_ids)
+                if match_id not in existing_matches_set:
+                    print(f"[{now()}] ➕ New match detected: {match.get('match')} in {sport}. Adding browser tab ({tier} tier).")
+                    multiplexer.add_match(match_id, make_match_cycle(sport, match), TIER_INTERVALS[tier])
+                    existing_matches_set.add(match_id)
+                    lifecycle.started(match_id, match.get('match'))
+                    added += 1
+                elif multiplexer.set_interval(match_id, TIER_INTERVALS[tier]):
+                    print(f"[{now()}] ⇅ {match.get('match')} moved to the {tier} tier")
+
+    # Matches gone from the listing (finished / closed) lose their tab after a grace period
+    for match_id in lifecycle.reconcile(listed):
+        existing_matches_set.discard(match_id)
+    print(f"[{now()}] 👀 {len(listed)} matches listed, {added} new")
+
+
+# Watcher thread: applies every listing discovery publishes as soon as it arrives;
+# falls back to re-reading the JSON file if nothing comes in for check_interval seconds
+def watch_for_new_matches(json_file, existing_matches_set, updates, check_interval=60):
+    print(f"[{now()}] 👀 Watcher started — applying listings as discovery publishes them.")
+    data = load_matches_from_json(json_file)
     while True:
-        print(f"[{now()}] 👀 Watcher started — monitoring for new matches every {check_interval}s.")
         try:
-            data = load_matches_from_json(json_file)
             if data:
-                for sport_entry in data:
-                    sport = sport_entry.get("sport", "Unknown")
-                    matches = sport_entry.get("matches", [])
-                    for match in matches:
-                        if match.get("fancy_bet", False) or match.get("sportsbook", False):
-                            match_id = f"{sport}|{match.get('match', '')}|{match.get('url', '')}"
-                            if match_id not in existing_matches_set:
-                                print(f"[{now()}] ➕ New match detected: {match.get('match')} in {sport}. Starting scraper thread.")
-                                thread = threading.Thread(
-                                    target=process_match_forever,
-                                    args=(sport, match),
-                                    daemon=True
-                                )
-                                thread.start()
-                                threads.append(thread)
-                                existing_matches_set.add(match_id)
-                            else:
-                                print(" ?? No New Matches Found ")
-                            
+                apply_listing(data, existing_matches_set)
             else:
                 print(f"[{now()}] ⚠️ Watcher found no matches in JSON.")
         except Exception as e:
             print(f"[{now()}] ❌ Watcher error: {e}")
 
-        time.sleep(check_interval)
+        try:
+            _, data = updates.get(timeout=check_interval)
+        except queue.Empty:
+            data = load_matches_from_json(json_file)  # keeps lifecycle grace timers moving if discovery stalls
 
 initial_scrape_done = threading.Event()
 
@@ -147,8 +163,18 @@ initial_scrape_done = threading.Event()
 if __name__ == "__main__":
     threads = []
     existing_matches_set = set()
+    # Every Chrome comes from one capped pool: 5 tab hosts + 1 for discovery
+    driver_pool = DriverPool(create_driver, max_drivers=6)
+    # A few browsers with many tabs each instead of one Chrome per match
+    multiplexer = TabMultiplexer(driver_pool, tabs_per_browser=10, max_browsers=5)
+    lifecycle = MatchLifecycle(multiplexer, audit_file="TOMMOROW_lifecycle.ndjson")
+    track_runtime(driver_pool, multiplexer)
+    start_metrics_server(METRICS_PORTS["TOMMOROW"])
     json_file = "TOMMOROW_MATCHES.json"
     json_path = Path(json_file)
+    # Discovery in this process pushes each listing here; the file watcher covers external discovery runs
+    listing_updates = subscribe({"TOMMOROW"})
+    start_file_watcher("TOMMOROW", json_file)
 
     def periodic_scraper_loop():
         first_run = True
@@ -156,13 +182,14 @@ if __name__ == "__main__":
             print(f"\n[{now()}] 🫀 Heartbeat: periodic_scraper_loop is alive")
             print(f"[{now()}] ⏳ Starting periodic scrape...")
             try:
-                scrape_data()
+                scrape_data(pool=driver_pool)
                 print(f"[{now()}] ✅ Periodic scrape completed.")
                 if first_run:
                     initial_scrape_done.set()
                     first_run = False
             except Exception as e:
                 print(f"[{now()}] ❌ Error in periodic scrape: {e}")
+                inc("scrape_errors_total", stage="discovery")
         
             print(f"[{now()}] ⏱ periodic_scraper sleeping 2 minutes...\n")
             time.sleep(120)
@@ -176,7 +203,7 @@ if __name__ == "__main__":
         while not (json_path.exists() and json_path.stat().st_size > 0):
             print(f"[{now()}] ⚠️ JSON file not ready yet. Waiting 10 seconds...")
             time.sleep(10)
-        watch_for_new_matches(json_file, existing_matches_set)
+        watch_for_new_matches(json_file, existing_matches_set, listing_updates)
 
     periodic_thread = threading.Thread(target=periodic_scraper_loop, daemon=True)
     periodic_thread.start()
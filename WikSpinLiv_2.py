@@ -2,108 +2,186 @@
 import time
 import orjson  # ✅ Fast JSON library
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-
-def scrape_wickspin_live(main_url, output_file, update_interval=0.0, headless=True, run_forever=True, driver=None):
+from odds_observer import drain_changes, apply_changes, capture_lag, RESYNC_SECONDS
+from network_feed import capture_sections, merge_sections
+from snapshot_writer import write_if_changed
+from odds_history import append_history
+from odds_columns import append_columns
+from market_subscriptions import SELECT_ROWS_JS, subscription_for, select_rows, subscribed_changes
+from cycle_budget import CycleBudget, StaleFields
+from scrape_metrics import timed
+
+STALE_EMPTY_CYCLES = 20  # reload after this many cycles in a row with no markets on the page
+MARKET_PANELS_CSS = ".exchange_panel_line, div.mb-1px.px-1.relative"
+OBSERVE_LIMITS = {"exchange_odds": 1000, "fancy_markets": 1000}  # every row; subscribed_changes() filters
+
+# Tags the loaded document so later calls can tell whether the page is still the one we opened
+MARK_PAGE_JS = "window.__wickspinUrl = arguments[0]; window.__wickspinEmpty = 0;"
+
+# Runs inside the page: reads every exchange_panel_line and the subscribed fancy containers in a single
+# pass and returns the same structure the per-element scraper used to build.
+# arguments[0] is the fancy_markets subscription ({patterns, max}, see market_subscriptions.py).
+# arguments[1] is the fingerprint of our last full read; if the panels' text still hashes to it
+# the script returns {unchanged: true} before touching a single price element.
+EXTRACT_MARKETS_JS = SELECT_ROWS_JS + ("""
+const fancySpec = arguments[0];
+const lastFingerprint = arguments[1];
+const pageInfo = () => ({marker: window.__wickspinUrl || null, href: location.href, empty_cycles: window.__wickspinEmpty || 0});
+
+// FNV-1a over the panels' textContent (no layout, unlike innerText)
+const panels = document.querySelectorAll("%s");
+let fingerprint = 0x811c9dc5;
+for (const panel of panels) {
+    const content = panel.textContent + "\u0001";
+    for (let i = 0; i < content.length; i++) {
+        fingerprint ^= content.charCodeAt(i);
+        fingerprint = Math.imul(fingerprint, 0x01000193) >>> 0;
+    }
+}
+fingerprint = panels.length + ":" + fingerprint.toString(16);
+if (panels.length && fingerprint === lastFingerprint) {
+    return {unchanged: true, fingerprint: fingerprint, page: pageInfo()};
+}
+
+const text = (el) => (el ? (el.innerText || el.textContent || "").trim() : "");
+const first = (root, sel) => (root ? root.querySelector(sel) : null);
+
+const exchange_odds = [];
+for (const line of document.getElementsByClassName("exchange_panel_line")) {
+    const h2 = first(line, "h2");
+    const back = first(line, "div[title='BACK']");
+    const lay = first(line, "div[title='LAY']");
+    if (!h2 || !back || !lay) continue;
+    exchange_odds.push({
+        team: text(h2).split("\\n")[0],
+        back: {odds: text(first(back, "h3")), volume: text(first(back, "p"))},
+        lay: {odds: text(first(lay, "h3")), volume: text(first(lay, "p"))}
+    });
+}
+
+const fancy_markets = [];
+const containers = Array.from(document.querySelectorAll("div.mb-1px.px-1.relative")).filter((c) => first(c, "h2"));
+for (const container of selectRows(containers, (c) => first(c, "h2").textContent.trim(), fancySpec)) {
+    const h2 = first(container, "h2");
+    container.scrollIntoView(true);
+
+    const statusEl = first(container, 'div[data-testid="fancybet-market-status"]');
+    const status = statusEl ? text(statusEl) : "Active";
+    const market = {title: text(h2), status: status};
+
+    if (status.toLowerCase() === "suspend") {
+        market.no = {odds: null, value: null};
+        market.yes = {odds: null, value: null};
+    } else {
+        for (const side of ["NO", "YES"]) {
+            const option = first(container, `div[title="${side}"]`);
+            market[side.toLowerCase()] = {
+                odds: text(first(option, "h3")) || "N/A",
+                value: text(first(option, "p")) || "N/A"
+            };
+        }
+    }
+    fancy_markets.push(market);
+}
+
+const empty = exchange_odds.length === 0 && fancy_markets.length === 0;
+window.__wickspinEmpty = empty ? (window.__wickspinEmpty || 0) + 1 : 0;
+
+return {
+    exchange_odds: exchange_odds,
+    fancy_markets: fancy_markets,
+    fingerprint: fingerprint,
+    page: pageInfo()
+};
+""" % MARKET_PANELS_CSS)
+
+
+# capture="observe" keeps (snapshot, last full read time) per output file and patches it with observer deltas
+_observed_snapshots = {}
+# capture="network" keeps (snapshot, sections fed by the network, last DOM read time) per output file
+_network_snapshots = {}
+# Last full extraction per output file: (page fingerprint, data, fancy subscription), reused while both hold
+_extracted = {}
+# Last-known value of every field per output file, for what a cycle couldn't read in its budget
+_stale_fields = {}
+
+
+# Drops everything kept for a match's output file once its worker is retired
+def forget_output(output_file):
+    for cache in (_observed_snapshots, _network_snapshots, _extracted, _stale_fields):
+        cache.pop(output_file, None)
+
+
+# SPA route of a URL, e.g. "/full-market/4-34804951" for ".../#/full-market/4-34804951?marketId=..."
+def page_route(url):
+    return (url or "").split("#", 1)[-1].split("?", 1)[0]
+
+
+def write_data_file(data, filename):
+    with timed("scrape_stage_seconds", stage="serialize", scraper="wickspin"):
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    with timed("scrape_stage_seconds", stage="write", scraper="wickspin"), open(filename, "wb") as f:
+        f.write(payload)
+
+
+# ✅ Fast saving with orjson; skipped (returns False) when the odds match the last write.
+# Every snapshot actually written is also appended to the match's history log and column store.
+def save_data_to_json(data, filename):
+    if not write_if_changed(filename, data, write_data_file):
+        return False
+    append_history(filename, data)
+    append_columns(filename, data)
+    return True
+
+
+# subscription: market_subscriptions.subscription_for(sport, match); the default spec (first 5 fancy markets) if None
+def scrape_wickspin_live(main_url, output_file, update_interval=0.0, headless=True, run_forever=True, driver=None, capture="poll", subscription=None):
     if driver is None:
         raise ValueError("A Selenium WebDriver instance must be provided via the 'driver' argument.")
 
-    wait = WebDriverWait(driver, 2)
-
-    def get_text_when_nonempty(parent, tag_name, timeout=1):
-        try:
-            return WebDriverWait(parent, timeout).until(
-                lambda e: e.find_element(By.TAG_NAME, tag_name).text.strip() != ""
-            ) and parent.find_element(By.TAG_NAME, tag_name).text.strip()
-        except TimeoutException:
-            return ""
+    subscription = subscription or subscription_for()
+    stale_fields = _stale_fields.setdefault(output_file, StaleFields())
+    budget = CycleBudget()  # replaced at the start of every cycle
+
+    def load_page():
+        with timed("scrape_stage_seconds", stage="page_load", scraper="wickspin"):
+            driver.get(main_url)
+        driver.execute_script(MARK_PAGE_JS, main_url)
+        if capture == "observe":
+            drain_changes(driver, "wickspin", OBSERVE_LIMITS)  # arm before the first read so nothing slips between
+        # Extraction still runs if the panels aren't up within the cycle's budget; what's missing goes out
+        # stale, and an empty page counts towards STALE_EMPTY_CYCLES
+        with timed("scrape_stage_seconds", stage="page_ready", scraper="wickspin"):
+            budget.wait_until(driver, lambda d: d.find_elements(By.CSS_SELECTOR, MARKET_PANELS_CSS), 2)
+
+    # Reload only when the tab left our match route, the document was replaced, or the session went blank
+    def page_is_stale(page):
+        if page.get("marker") != main_url:
+            return True
+        if page_route(page.get("href")) != page_route(main_url):
+            return True
+        return page.get("empty_cycles", 0) >= STALE_EMPTY_CYCLES
 
     def scrape_market_data():
-        data = {}
-
-        # --- Market Depth ---
-        # try:
-        #     bet_limit_div = driver.find_element(By.CSS_SELECTOR, 'div[data-testid="betLimit"]')
-        #     spans = bet_limit_div.find_elements(By.TAG_NAME, "span")
-        #     if len(spans) >= 2:
-        #         label = spans[0].text.strip()
-        #         value = spans[1].text.strip()
-        #         data["market_depth"] = {label: value}
-        #     else:
-        #         data["market_depth"] = {}
-        # except NoSuchElementException:
-        #     data["market_depth"] = {}
-
-        # --- Exchange Odds ---
-        data["exchange_odds"] = []
+        # ✅ One execute_script round trip returns exchange odds + fancy markets together,
+        # or just {unchanged: true} when the panels hash the same as at our last read
+        fingerprint, last_data, last_spec = _extracted.get(output_file, (None, None, None))
+        if last_spec != subscription["fancy_markets"]:
+            fingerprint = None  # subscription edited since the last read: same page, different selection
         try:
-            match_lines = driver.find_elements(By.CLASS_NAME, "exchange_panel_line")
-            for line in match_lines:
-                try:
-                    h2_elem = line.find_element(By.TAG_NAME, "h2")
-                    name = h2_elem.text.strip().split("\n")[0]
-
-                    back_elem = line.find_element(By.CSS_SELECTOR, "div[title='BACK']")
-                    back_odds = back_elem.find_element(By.TAG_NAME, "h3").text.strip()
-                    back_volume = back_elem.find_element(By.TAG_NAME, "p").text.strip()
-
-                    lay_elem = line.find_element(By.CSS_SELECTOR, "div[title='LAY']")
-                    lay_odds = lay_elem.find_element(By.TAG_NAME, "h3").text.strip()
-                    lay_volume = lay_elem.find_element(By.TAG_NAME, "p").text.strip()
-
-                    data["exchange_odds"].append({
-                        "team": name,
-                        "back": {"odds": back_odds, "volume": back_volume},
-                        "lay": {"odds": lay_odds, "volume": lay_volume}
-                    })
-                except Exception:
-                    continue
+            with timed("scrape_stage_seconds", stage="extract", scraper="wickspin"):
+                data = driver.execute_script(EXTRACT_MARKETS_JS, subscription["fancy_markets"], fingerprint) or {}
         except Exception:
-            data["exchange_odds"] = []
+            data = {}
 
-        # --- Fancy Bet Markets (LIMIT TO 5) ---
-        data["fancy_markets"] = []
-        try:
-            containers = driver.find_elements(By.CSS_SELECTOR, 'div.mb-1px.px-1.relative')
-            for index, container in enumerate(containers):
-                if index >= 5:
-                    break  # ✅ Limit to 5 fancy markets
-                try:
-                    driver.execute_script("arguments[0].scrollIntoView(true);", container)
-                    title = container.find_element(By.TAG_NAME, "h2").text.strip()
-
-                    status_el = container.find_elements(By.CSS_SELECTOR, 'div[data-testid="fancybet-market-status"]')
-                    status = status_el[0].text.strip() if status_el else "Active"
-
-                    market = {"title": title, "status": status}
-
-                    if status.lower() == "suspend":
-                        market["no"] = {"odds": None, "value": None}
-                        market["yes"] = {"odds": None, "value": None}
-                    else:
-                        try:
-                            no_option = container.find_element(By.CSS_SELECTOR, 'div[title="NO"]')
-                            no_odds = get_text_when_nonempty(no_option, "h3")
-                            no_value = get_text_when_nonempty(no_option, "p")
-                            market["no"] = {"odds": no_odds or "N/A", "value": no_value or "N/A"}
-                        except:
-                            market["no"] = {"odds": "N/A", "value": "N/A"}
-
-                        try:
-                            yes_option = container.find_element(By.CSS_SELECTOR, 'div[title="YES"]')
-                            yes_odds = get_text_when_nonempty(yes_option, "h3")
-                            yes_value = get_text_when_nonempty(yes_option, "p")
-                            market["yes"] = {"odds": yes_odds or "N/A", "value": yes_value or "N/A"}
-                        except:
-                            market["yes"] = {"odds": "N/A", "value": "N/A"}
-
-                    data["fancy_markets"].append(market)
-                except:
-                    continue
-        except:
-            data["fancy_markets"] = []
+        page = data.pop("page", {})
+        if data.get("unchanged") and last_data is not None:
+            return orjson.loads(orjson.dumps(last_data)), page, False
+
+        fingerprint = data.pop("fingerprint", None)
+        data.setdefault("exchange_odds", [])
+        data.setdefault("fancy_markets", [])
+        _extracted[output_file] = (fingerprint, orjson.loads(orjson.dumps(data)), subscription["fancy_markets"])
 
         # --- Nested iframe URL ---
         # data["nested_iframe_url"] = None
@@ -147,18 +225,88 @@ def scrape_wickspin_live(main_url, output_file, update_interval=0.0, headless=Tr
         #     finally:
         #         driver.switch_to.default_content()
 
-        return data
-
-    # ✅ Fast saving with orjson
-    def save_data_to_json(data, filename):
-        with open(filename, "wb") as f:
-            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
-
-    driver.get(main_url)  # Load once per scrape call
-
-    data = scrape_market_data()
-    save_data_to_json(data, output_file)
-    print(f"[✓] Data updated and saved to '{output_file}'")
+        return data, page, True
+
+    # Returns (data, changed); unchanged cycles skip the extraction and the save
+    def poll_cycle():
+        data, page, changed = scrape_market_data()
+        if page_is_stale(page):
+            print(f"[↻] Page stale, reloading '{main_url}'")
+            load_page()
+            data, page, changed = scrape_market_data()
+        return data, changed
+
+    # Push mode: drain what the in-page observer queued and patch the last snapshot; full read only on resync
+    def observe_cycle():
+        snapshot, synced_at = _observed_snapshots.get(output_file, (None, 0.0))
+        drained = drain_changes(driver, "wickspin", OBSERVE_LIMITS)
+        changes = drained["changes"] if snapshot is None else subscribed_changes(snapshot, drained["changes"], subscription)
+
+        if (snapshot is None or drained["installed_now"] or drained["overflow"]
+                or time.time() - synced_at >= RESYNC_SECONDS
+                or page_route(drained.get("href")) != page_route(main_url)
+                or not apply_changes(snapshot, changes)):
+            snapshot, _ = poll_cycle()
+            _observed_snapshots[output_file] = (snapshot, time.time())
+            return snapshot, True
+
+        if changes:
+            lag_ms = max(capture_lag(change) for change in changes) * 1000
+            print(f"[Δ] {len(changes)} change(s) captured, max lag {lag_ms:.0f} ms")
+        return snapshot, bool(changes)
+
+    # Network mode: take odds straight from the site's XHR/WebSocket payloads (Chrome DevTools Protocol).
+    # DOM extraction fills any section the feed hasn't delivered yet and takes over for the cycle
+    # whenever an odds-like payload arrives that we can't map.
+    def network_cycle():
+        snapshot, fed, synced_at = _network_snapshots.get(output_file, (None, set(), 0.0))
+        sections, feed_ts, unrecognised = capture_sections(driver, "wickspin")
+
+        full_read = snapshot is None or unrecognised or time.time() - synced_at >= RESYNC_SECONDS
+        if full_read or not fed >= {"exchange_odds", "fancy_markets"}:
+            dom, _ = poll_cycle()
+            if full_read:
+                snapshot, synced_at = dom, time.time()
+            else:
+                for section in ("exchange_odds", "fancy_markets"):
+                    if section not in fed:
+                        snapshot[section] = dom[section]
+            changed = True
+        else:
+            changed = bool(sections)
+
+        sections.pop("markets", None)  # premium markets are scrape_premium_data's
+        merge_sections(snapshot, sections)
+        snapshot["fancy_markets"] = select_rows(snapshot["fancy_markets"], "fancy_markets", subscription["fancy_markets"])
+        fed |= set(sections)
+        _network_snapshots[output_file] = (snapshot, fed, synced_at)
+
+        if sections:
+            print(f"[⇣] Feed update for {', '.join(sorted(sections))} at {feed_ts / 1000:.3f}")
+        return snapshot, changed
+
+    # ✅ Navigate once, then re-extract in place; callers looping with run_forever=False reuse the open page too
+    while True:
+        budget = CycleBudget()
+        if capture == "observe":
+            data, changed = observe_cycle()
+        elif capture == "network":
+            data, changed = network_cycle()
+        else:
+            data, changed = poll_cycle()
+
+        # Fields a cycle over budget couldn't read go out with their last-known value, flagged stale with their age
+        data = stale_fields.fill(data, budget.ran_out())
+        if budget.expired():
+            print(f"[⏱] Cycle over its {budget.seconds}s budget; published what was read")
+
+        if changed and save_data_to_json(data, output_file):
+            print(f"[✓] Data updated and saved to '{output_file}'")
+
+        if not run_forever:
+            return data
+
+        time.sleep(update_interval)
 
 
 
@@ -3,126 +3,279 @@ import json
 import time
 from datetime import datetime
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-
-def scrape_premium_data(loop_interval=0.5, main_url=None, output_file=None, run_forever=True, driver=None ,  headless=True):
+from odds_observer import drain_changes, apply_changes, capture_lag, RESYNC_SECONDS
+from network_feed import capture_sections, merge_sections
+from snapshot_writer import write_if_changed
+from odds_history import append_history
+from odds_columns import append_columns
+from market_subscriptions import SELECT_ROWS_JS, subscription_for, select_rows, subscribed_changes
+from cycle_budget import CycleBudget, StaleFields
+from scrape_metrics import inc, timed
+from WikSpinLiv_2 import MARK_PAGE_JS
+
+OBSERVE_LIMITS = {"markets": 1000}  # every block; subscribed_changes() keeps the subscribed ones
+READY_TIMEOUT = 2  # upper bound on waiting for the page / re-expanded markets to render, within the cycle budget
+
+# Market blocks the subscription picks, in priority order (shared by the two scripts below)
+SUBSCRIBED_BLOCKS_JS = SELECT_ROWS_JS + """
+const titleOf = (block) => block.querySelector("div.relative.py-2.pl-0 > span.text-13.font-bold");
+const subscribedBlocks = (spec) => selectRows(
+    Array.from(document.querySelectorAll("div.mb-1")).filter(titleOf), (block) => titleOf(block).textContent.trim(), spec);
+"""
+
+# One round trip per cycle, inside the page. arguments: match URL, markets subscription ({patterns, max}),
+# fingerprint of our last read, whether to read.
+#   - {stale: true} if the tab isn't on our match document any more (other route, or reloaded without our mark)
+#   - clicks open any subscribed block that collapsed (rotate-180 = open) and returns their titles in `opened`;
+#     the caller waits for them to render and asks again
+#   - otherwise, when reading: {unchanged: true} while the blocks' text and suspension overlays hash to the
+#     last fingerprint, else every subscribed market in one pass
+PREMIUM_SESSION_JS = SUBSCRIBED_BLOCKS_JS + """
+const url = arguments[0], spec = arguments[1], lastFingerprint = arguments[2], read = arguments[3];
+const route = (u) => (u.includes("#") ? u.slice(u.indexOf("#") + 1) : u).split("?")[0];
+if (window.__wickspinUrl !== url || route(location.href) !== route(url)) {
+    return {stale: true};
+}
+
+const blocks = subscribedBlocks(spec);
+const opened = [];
+for (const block of blocks) {
+    const header = block.querySelector("div.relative.py-2.pl-0");
+    const arrow = header.querySelector("i.icon-arrow-down-sencodary");
+    if (arrow && !arrow.classList.contains("rotate-180")) {
+        header.scrollIntoView({block: "center"});
+        header.click();
+        opened.push(titleOf(block).textContent.trim());
+    }
+}
+if (opened.length || !read) {
+    return {stale: false, opened: opened};
+}
+
+let hash = 0x811c9dc5;
+for (const block of blocks) {
+    const overlay = block.querySelector("div.absolute.w-full.h-full");
+    const content = block.textContent + "\u0001" + (overlay ? overlay.getAttribute("style") : "") + "\u0002";
+    for (let i = 0; i < content.length; i++) {
+        hash ^= content.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+}
+const fingerprint = blocks.length ? blocks.length + ":" + hash.toString(16) : null;
+if (fingerprint !== null && fingerprint === lastFingerprint) {
+    return {stale: false, opened: [], unchanged: true, fingerprint: fingerprint};
+}
+
+const text = (el) => (el ? (el.innerText || el.textContent || "").trim() : "");
+const markets = blocks.map((block) => {
+    const overlay = block.querySelector("div.absolute.w-full.h-full");
+    const status = overlay && !(overlay.getAttribute("style") || "").includes("display: none") ? "suspended" : "active";
+    const bets = [];
+    for (const box of block.querySelectorAll("div.grid.grid-cols-2 > div[title='back']")) {
+        const label = box.querySelector("p.text-9"), odds = box.querySelector("p.text-15");
+        if (label && odds) bets.push({bet: text(label), odds: text(odds), status: status});
+    }
+    return {market: text(titleOf(block)), bets: bets};
+});
+return {stale: false, opened: [], fingerprint: fingerprint, markets: markets};
+"""
+
+# Readiness after expanding: every subscribed block is open and has its bet boxes rendered
+MARKETS_READY_JS = SUBSCRIBED_BLOCKS_JS + """
+return subscribedBlocks(arguments[0]).every((block) => {
+    const arrow = block.querySelector("div.relative.py-2.pl-0 i.icon-arrow-down-sencodary");
+    return (!arrow || arrow.classList.contains("rotate-180"))
+        && block.querySelector("div.grid.grid-cols-2 > div[title='back']") !== null;
+});
+"""
+
+# Open premium sessions per output file (one match page each)
+_sessions = {}
+
+# Drops everything kept for a match's output file once its worker is retired
+def forget_output(output_file):
+    _sessions.pop(output_file, None)
+
+def write_premium_file(data, output_file):
+    with timed("scrape_stage_seconds", stage="serialize", scraper="premium"):
+        payload = json.dumps(data, ensure_ascii=False, indent=2)
+    with timed("scrape_stage_seconds", stage="write", scraper="premium"), open(output_file, "w", encoding="utf-8") as f:
+        f.write(payload)
+
+# Skipped (returns False) when the markets match the last write; the timestamp alone doesn't count.
+# Every snapshot actually written is also appended to the match's history log and column store.
+def save_premium_data(data, output_file):
+    if not write_if_changed(output_file, data, write_premium_file):
+        return False
+    append_history(output_file, data)
+    append_columns(output_file, data)
+    return True
+
+
+# A match page kept open across premium cycles, with what we last read from it.
+# The page is loaded once (or again only when it went stale); each cycle re-expands just the subscribed
+# markets that collapsed and waits for them to render instead of sleeping, for no longer than the cycle's
+# budget. It shares the page mark with scrape_wickspin_live, so both scrapers can run on one tab without
+# reloading it for each other.
+class PremiumSession:
+    def __init__(self, driver, main_url, output_file, capture="poll", subscription=None):
+        self.driver = driver
+        self.main_url = main_url
+        self.output_file = output_file
+        self.capture = capture
+        self.subscription = subscription or subscription_for()
+        self.budget = CycleBudget()     # the current cycle's; cycle() starts a new one
+        self.stale_fields = StaleFields()
+        self.fingerprint = None  # poll: page fingerprint at our last full read
+        self.markets = None      # poll: markets from that read, reused while the fingerprint holds
+        self.snapshot = None     # observe / network: last full read, patched with deltas
+        self.synced_at = 0.0
+        self.markets_fed = False
+
+    # A changed subscription invalidates everything read under the old one
+    def subscribe(self, subscription):
+        if subscription != self.subscription:
+            self.subscription = subscription
+            self.fingerprint = self.markets = self.snapshot = None
+
+    def load(self):
+        print(f"🌐 Opening premium page {self.main_url}")
+        if self.capture == "network":
+            capture_sections(self.driver, "premium")  # enable Network events before the page opens its feed
+        with timed("scrape_stage_seconds", stage="page_load", scraper="premium"):
+            self.driver.get(self.main_url)
+        self.driver.execute_script(MARK_PAGE_JS, self.main_url)
+        self.fingerprint = self.markets = self.snapshot = None
+        # The cycle reads whatever rendered by the deadline; a blank page is caught as stale again later
+        with timed("scrape_stage_seconds", stage="page_ready", scraper="premium"):
+            self.budget.wait_until(self.driver, lambda d: d.find_elements(By.CSS_SELECTOR, "div.mb-1"), READY_TIMEOUT)
+
+    def run_session_js(self, last_fingerprint, read):
+        with timed("scrape_stage_seconds", stage="extract" if read else "expand", scraper="premium"):
+            return self.driver.execute_script(PREMIUM_SESSION_JS, self.main_url, self.subscription["markets"],
+                                              last_fingerprint, read) or {"stale": True}
+
+    # Page on our match with the subscribed markets expanded; with read=True also their contents
+    # (or {"unchanged": True} while they still hash to last_fingerprint)
+    def extract(self, last_fingerprint=None, read=True):
+        state = self.run_session_js(last_fingerprint, read)
+        if state.get("stale"):
+            self.load()
+            state = self.run_session_js(None, read)
+        if state.get("opened"):
+            print(f"  ➡️ Re-expanded: {', '.join(state['opened'])}")
+            if not self.budget.wait_until(self.driver, lambda d: d.execute_script(MARKETS_READY_JS, self.subscription["markets"]), READY_TIMEOUT):
+                print("  ⚠️ Expanded markets still loading; reading what rendered")
+            if read:
+                state = self.run_session_js(None, read)
+        return state
+
+    def read_markets(self):
+        markets = self.extract().get("markets") or []
+        print(f"📦 Read {len(markets)} subscribed market(s).")
+        return markets
+
+    # One refresh within one CycleBudget; returns (combined_data, changed). If the budget ran out, fields it
+    # couldn't read go out with their last-known value, flagged in combined_data["stale"] with their age.
+    def cycle(self):
+        self.budget = CycleBudget()
+        combined_data = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "markets": []
+        }
+        changed = True
+
+        if self.capture == "observe":
+            # Push mode: only drain the observer queue; full read on first tick, resync or unknown market
+            self.extract(read=False)
+            drained = drain_changes(self.driver, "premium", OBSERVE_LIMITS)
+            changes = drained["changes"] if self.snapshot is None else subscribed_changes(self.snapshot, drained["changes"], self.subscription)
+            if (self.snapshot is None or drained["installed_now"] or drained["overflow"]
+                    or time.time() - self.synced_at >= RESYNC_SECONDS
+                    or not apply_changes(self.snapshot, changes)):
+                self.snapshot = {"markets": self.read_markets()}
+                self.synced_at = time.time()
+            elif changes:
+                lag_ms = max(capture_lag(change) for change in changes) * 1000
+                print(f"⚡ {len(changes)} market change(s) captured, max lag {lag_ms:.0f} ms")
+            else:
+                changed = False
+            combined_data["markets"] = self.snapshot["markets"]
+        elif self.capture == "network":
+            # Network mode: markets straight from the site's XHR/WebSocket payloads; DOM read until
+            # the feed has delivered them, when an odds payload can't be mapped, and on resync
+            self.extract(read=False)
+            sections, feed_ts, unrecognised = capture_sections(self.driver, "premium")
+            feed_markets = sections.get("markets")
+            if (self.snapshot is None or unrecognised or not self.markets_fed
+                    or time.time() - self.synced_at >= RESYNC_SECONDS):
+                self.snapshot = {"markets": self.read_markets()}
+                self.synced_at = time.time()
+            elif not feed_markets:
+                changed = False
+            if feed_markets:
+                merge_sections(self.snapshot, {"markets": feed_markets})
+                self.snapshot["markets"] = select_rows(self.snapshot["markets"], "markets", self.subscription["markets"])
+                self.markets_fed = True
+                combined_data["timestamp"] = datetime.utcfromtimestamp(feed_ts / 1000).isoformat() + "Z"
+                print(f"⇣ Feed update for {len(feed_markets)} market(s)")
+            combined_data["markets"] = self.snapshot["markets"]
+        else:
+            state = self.extract(self.fingerprint)
+            if state.get("unchanged") and self.markets is not None:
+                print("💤 Markets unchanged, skipping read.")
+                combined_data["markets"] = json.loads(json.dumps(self.markets))
+                changed = False
+            else:
+                combined_data["markets"] = state.get("markets") or []
+                print(f"📦 Read {len(combined_data['markets'])} subscribed market(s).")
+                self.fingerprint = state.get("fingerprint")
+                self.markets = json.loads(json.dumps(combined_data["markets"]))
+
+        combined_data = self.stale_fields.fill(combined_data, self.budget.ran_out())
+        if self.budget.expired():
+            print(f"⏱ Cycle over its {self.budget.seconds}s budget; published what was read")
+        return combined_data, changed
+
+
+# The session for output_file, opened on first use and replaced when the tab, URL or capture mode changes
+def premium_session(driver, main_url, output_file, capture="poll", subscription=None):
+    session = _sessions.get(output_file)
+    if session is None or session.driver is not driver or session.main_url != main_url or session.capture != capture:
+        session = _sessions[output_file] = PremiumSession(driver, main_url, output_file, capture, subscription)
+    elif subscription is not None:
+        session.subscribe(subscription)
+    return session
+
+# subscription: market_subscriptions.subscription_for(sport, match); the default spec (first 5 markets) if None
+def scrape_premium_data(loop_interval=0.5, main_url=None, output_file=None, run_forever=True, driver=None ,  headless=True, capture="poll", subscription=None):
     if driver is None:
         raise ValueError("A Selenium WebDriver instance must be provided via the 'driver' argument.")
 
-    main_url = main_url 
     output_file = output_file or "WikSpinLiv_2_Premium.json"
-
-    driver.get(main_url)
-    time.sleep(1)  # initial wait
-
-    # Open all closed dropdowns once
-    print("🔓 Opening all closed dropdowns...\n")
-    market_blocks = driver.find_elements(By.CSS_SELECTOR, "div.mb-1")
-    for idx, market in enumerate(market_blocks):
-        try:
-            header = market.find_element(By.CSS_SELECTOR, "div.relative.py-2.pl-0")
-            market_title = header.find_element(By.CSS_SELECTOR, "span.text-13.font-bold").text.strip()
-
-            try:
-                arrow_icon = header.find_element(By.CSS_SELECTOR, "i.icon-arrow-down-sencodary")
-                class_list = arrow_icon.get_attribute("class")
-                closed = "rotate-180" not in class_list  # rotate-180 = open
-            except NoSuchElementException:
-                closed = False
-
-            if closed:
-                print(f"  ➡️ Opening: {market_title}")
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", header)
-                header.click()
-                time.sleep(0.5)  # give some time after click
-            else:
-                print(f"  ✅ Already open: {market_title}")
-        except Exception as e:
-            print(f"  ⚠️ Failed to process dropdown {idx}: {e}")
-
-    print("\n✅ All dropdowns opened.\n")
+    # ✅ Callers looping with run_forever=False get the same open page and expanded markets every call
+    session = premium_session(driver, main_url, output_file, capture, subscription)
 
     while True:
-        combined_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "markets": []
-        }
-
         try:
             print(f"\n🔄 Refreshing data at {datetime.now().strftime('%H:%M:%S')}")
-            time.sleep(1)  # wait for page to update
-
-            markets = driver.find_elements(By.CSS_SELECTOR, "div.mb-1")
-            print(f"📦 Found {len(markets)} market blocks.")
-
-            for index, market in enumerate(markets):
-                if index >= 5:  # ✅ Limit to first 5 markets
-                    break
-
-                try:
-                    title_elem = market.find_element(By.CSS_SELECTOR, "div.relative.py-2.pl-0 > span.text-13.font-bold")
-                    market_title = title_elem.text.strip()
-
-                    options_data = []
-
-                    bet_boxes = market.find_elements(By.CSS_SELECTOR, "div.grid.grid-cols-2 > div[title='back']")
-
-                    # If no bets found, try clicking the arrow-down to expand
-                    if len(bet_boxes) == 0:
-                        try:
-                            arrow_icon = market.find_element(By.CSS_SELECTOR, "i.icon-arrow-down-sencodary.text-12.mr-3.justify-self-end.text-black.transition-transform.origin-center.duration-300.transform.rotate-180")
-                            print(f"  ⚡ Bets empty for '{market_title}', clicking arrow to expand...")
-                            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", arrow_icon)
-                            time.sleep(0.5)
-                            arrow_icon.click()
-                            time.sleep(1)  # wait for bets to load
-                            bet_boxes = market.find_elements(By.CSS_SELECTOR, "div.grid.grid-cols-2 > div[title='back']")
-                        except NoSuchElementException:
-                            print(f"  ⚠️ No arrow icon found to expand bets for market '{market_title}'")
-
-                    # Detect if market is suspended
-                    try:
-                        overlay_div = market.find_element(By.CSS_SELECTOR, "div.absolute.w-full.h-full")
-                        style = overlay_div.get_attribute("style")
-                        status = "suspended" if "display: none" not in style else "active"
-                    except NoSuchElementException:
-                        status = "active"
-
-                    for box in bet_boxes:
-                        try:
-                            bet_label = box.find_element(By.CSS_SELECTOR, "p.text-9").text.strip()
-                            odds_value = box.find_element(By.CSS_SELECTOR, "p.text-15").text.strip()
-
-                            options_data.append({
-                                "bet": bet_label,
-                                "odds": odds_value,
-                                "status": status
-                            })
-                        except Exception as e:
-                            print(f"⚠️ Bet option parse error: {e}")
-
-                    combined_data["markets"].append({
-                        "market": market_title,
-                        "bets": options_data
-                    })
-
-                except Exception as e:
-                    print(f"⚠️ Market parse error: {e}")
+            combined_data, changed = session.cycle()
 
             # Save data
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(combined_data, f, ensure_ascii=False, indent=2)
-
-            print(f"✅ Updated data saved to {output_file}")
+            if changed and save_premium_data(combined_data, output_file):
+                print(f"✅ Updated data saved to {output_file}")
             print(f"🔁 Waiting {loop_interval} seconds before next refresh...\n")
 
             if not run_forever:
-                break
+                return combined_data
 
             time.sleep(loop_interval)
 
         except Exception as e:
             print(f"❌ Scrape error in loop: {e}")
+            inc("scrape_errors_total", stage="premium")
+            if not run_forever:
+                raise  # one cycle for a shared tab host: its error and restart handling takes it from here
             time.sleep(loop_interval)
 
 
@@ -0,0 +1,49 @@
+import orjson
+
+# Per-match sample rate on top of the tier interval: back off while the markets sit still,
+# snap back to the tier's rate the moment anything moves (cricket fancy goes quiet between balls)
+BACKOFF_FACTOR = 2.0
+MAX_BACKOFF = 16.0   # slowest rate = tier interval × this (0.5s in-play → 8s)
+QUIET_CYCLES = 2     # identical snapshots in a row before the first back-off step
+
+MARKET_SECTIONS = ("exchange_odds", "fancy_markets", "markets")
+
+
+# Odds + statuses of everything a cycle scraped, without timestamps; equal bytes = nothing moved
+def market_signature(result):
+    sections = {}
+    for name, data in sorted((result or {}).items()):
+        if isinstance(data, dict):
+            sections[name] = {section: data.get(section) for section in MARKET_SECTIONS if section in data}
+    return orjson.dumps(sections, option=orjson.OPT_SORT_KEYS)
+
+
+class AdaptivePacer:
+    def __init__(self, base_interval, max_backoff=MAX_BACKOFF):
+        self.base_interval = base_interval
+        self.max_backoff = max_backoff
+        self.interval = base_interval
+        self.signature = None
+        self.quiet = 0
+
+    # New tier: start again from its fastest rate
+    def rebase(self, base_interval):
+        self.base_interval = base_interval
+        self.interval = base_interval
+        self.quiet = 0
+
+    # Feed one cycle's scraped data; returns the interval until the next cycle
+    def observe(self, result):
+        # Statuses are in the signature, so a market going into or out of suspension counts as a move;
+        # one that stays suspended is as quiet as any other
+        signature = market_signature(result)
+        if signature != self.signature:
+            self.signature = signature
+            self.quiet = 0
+            self.interval = self.base_interval
+            return self.interval
+
+        self.quiet += 1
+        if self.quiet >= QUIET_CYCLES:
+            self.interval = min(self.interval * BACKOFF_FACTOR, self.base_interval * self.max_backoff)
+        return self.interval
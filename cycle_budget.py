@@ -0,0 +1,128 @@
+import time
+
+import orjson
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+# How long one fancy or premium scrape cycle may spend waiting on the page (loads, re-expanded
+# markets rendering). Past it the cycle reads whatever is on the page and emits that.
+CYCLE_BUDGET = 1.5
+# A field missing from a read is published with its last-known value, flagged stale, for this long;
+# after that it's published as read (missing)
+STALE_LIMIT = 60
+
+MISSING = (None, "", "N/A")
+ROW_KEYS = {"exchange_odds": "team", "fancy_markets": "title", "markets": "market"}
+
+
+# Deadline for one scrape cycle; every wait in the cycle draws on the same remainder
+class CycleBudget:
+    def __init__(self, seconds=CYCLE_BUDGET):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+        self.timed_out = False  # a wait_until gave up before its condition held
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.remaining() == 0.0
+
+    # The cycle didn't get everything it waited for: out of time, or a wait gave up
+    def ran_out(self):
+        return self.timed_out or self.expired()
+
+    # WebDriverWait capped by both `timeout` and the budget left; False if the condition didn't hold in time
+    def wait_until(self, driver, condition, timeout):
+        seconds = min(timeout, self.remaining())
+        try:
+            if seconds <= 0:
+                held = bool(condition(driver))
+            else:
+                WebDriverWait(driver, seconds, poll_frequency=0.1).until(condition)
+                held = True
+        except TimeoutException:
+            held = False
+        self.timed_out = self.timed_out or not held
+        return held
+
+
+# Last fresh value of every field a scraper reads for one output file. fill() returns a copy of a
+# snapshot; when the cycle ran out of budget, missing fields are put back to their last-known value,
+# plus a "stale" list saying which ones and how old they are. A cycle that finished in time publishes
+# blanks as read: the site blanked them.
+#   "stale": [{"section": "fancy_markets", "market": "6 over runs", "selection": "", "field": "yes.odds", "age": 4}]
+# Whole rows an overrun read missed (panels or blocks not up yet after a reload) are put back the same
+# way, with field "row", rather than published as removed.
+# Suspended markets are left alone: their blanks are what the site shows, not a slow read.
+class StaleFields:
+    def __init__(self, limit=STALE_LIMIT):
+        self.limit = limit
+        self.known = {}  # (section, market, selection, field) -> (value, time it was last read)
+        self.rows = {}   # section -> {row key: (row as last read, time)}, in page order
+
+    def fill(self, data, ran_out):
+        data = orjson.loads(orjson.dumps(data))
+        data.pop("stale", None)
+        now = time.time()
+        stale = []
+
+        for section, key_field in ROW_KEYS.items():
+            known_rows = self.rows.setdefault(section, {})
+            for row in data.get(section) or []:
+                known_rows[row.get(key_field)] = (orjson.loads(orjson.dumps(row)), now)
+
+        def check(key, container, field):
+            value = container.get(field)
+            if value not in MISSING and value != []:
+                self.known[key] = (value, now)
+                return False
+            known = self.known.get(key)
+            if not ran_out or known is None or now - known[1] > self.limit:
+                return False
+            container[field] = orjson.loads(orjson.dumps(known[0]))
+            section, market, selection, name = key
+            stale.append({"section": section, "market": market, "selection": selection, "field": name,
+                          "age": round(now - known[1])})
+            return True
+
+        for runner in data.get("exchange_odds") or []:
+            for side in ("back", "lay"):
+                quote = runner.get(side)
+                if isinstance(quote, dict):
+                    for field in ("odds", "volume"):
+                        check(("exchange_odds", "", runner.get("team"), f"{side}.{field}"), quote, field)
+        for market in data.get("fancy_markets") or []:
+            if (market.get("status") or "").lower() == "suspend":
+                continue
+            for side in ("no", "yes"):
+                quote = market.get(side)
+                if isinstance(quote, dict):
+                    for field in ("odds", "value"):
+                        check(("fancy_markets", market.get("title"), "", f"{side}.{field}"), quote, field)
+        for market in data.get("markets") or []:
+            # A block whose bets didn't render in time keeps its last bets as a whole
+            if check(("markets", market.get("market"), "", "bets"), market, "bets"):
+                continue
+            for bet in market.get("bets") or []:
+                if bet.get("status") != "suspended":
+                    check(("markets", market.get("market"), bet.get("bet"), "odds"), bet, "odds")
+
+        # Rows put back after the field checks, so their values don't count as freshly read
+        for section, key_field in ROW_KEYS.items():
+            if not ran_out:
+                break
+            rows = data.get(section) or []
+            present = {row.get(key_field) for row in rows}
+            for key, (row, read_at) in self.rows[section].items():
+                if key not in present and now - read_at <= self.limit:
+                    rows.append(orjson.loads(orjson.dumps(row)))
+                    market, selection = ("", key) if section == "exchange_odds" else (key, "")
+                    stale.append({"section": section, "market": market, "selection": selection, "field": "row",
+                                  "age": round(now - read_at)})
+            if rows:
+                data[section] = rows
+
+        if stale:
+            data["stale"] = stale
+        return data
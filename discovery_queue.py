@@ -0,0 +1,100 @@
+# Hands discovery results straight to the watchers instead of making them poll *_MATCHES.json.
+#
+# In-process: scrape_data() in IN_PLAY_MATCHES / TODAY_MATCHES / TOMMOROW_MATCHES calls
+# expect_listing(feed, all_sports) before saving the file and publish_listing(feed, all_sports)
+# right after; every subscribe()d watcher gets (feed, listing) immediately.
+# External producers (the discovery scripts run on their own): watch_listing_file() notices the
+# rewritten JSON (inotify if inotify_simple is installed, a 1s stat poll otherwise) and publishes it.
+
+import hashlib
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+
+try:
+    from inotify_simple import INotify, flags  # optional: event-driven file watching on Linux
+except ImportError:
+    INotify = None
+
+FILE_POLL_INTERVAL = 1.0
+
+_subscribers = []  # (feeds or None, queue.Queue)
+_published = {}    # feed -> hash of the last listing published, so the file watcher skips our own writes
+_lock = threading.Lock()
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+def listing_hash(listing):
+    return hashlib.blake2b(orjson.dumps(listing), digest_size=16).digest()
+
+
+# Queue of (feed, listing) for the given feeds (all feeds if None)
+def subscribe(feeds=None):
+    updates = queue.Queue()
+    with _lock:
+        _subscribers.append((set(feeds) if feeds else None, updates))
+    return updates
+
+
+# Marks a listing as ours before it is written, so the file watcher doesn't publish it a second time
+def expect_listing(feed, listing):
+    digest = listing_hash(listing)
+    with _lock:
+        _published[feed] = digest
+
+
+def publish_listing(feed, listing):
+    expect_listing(feed, listing)
+    with _lock:
+        subscribers = list(_subscribers)
+    for feeds, updates in subscribers:
+        if feeds is None or feed in feeds:
+            updates.put((feed, listing))
+
+
+def publish_file(feed, json_file):
+    try:
+        with open(json_file, "rb") as f:
+            listing = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return False  # missing or caught mid-write; the closing write fires again
+    with _lock:
+        if _published.get(feed) == listing_hash(listing):
+            return False
+    print(f"[{now()}] 📥 {feed}: new listing in {json_file}")
+    publish_listing(feed, listing)
+    return True
+
+
+def watch_listing_file(feed, json_file):
+    path = Path(json_file).resolve()
+    if INotify is not None:
+        inotify = INotify()
+        inotify.add_watch(str(path.parent), flags.CLOSE_WRITE | flags.MOVED_TO)
+        while True:
+            if any(event.name == path.name for event in inotify.read()):
+                publish_file(feed, path)
+    else:
+        last_mtime = None
+        while True:
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None and mtime != last_mtime:
+                last_mtime = mtime
+                publish_file(feed, path)
+            time.sleep(FILE_POLL_INTERVAL)
+
+
+def start_file_watcher(feed, json_file):
+    thread = threading.Thread(target=watch_listing_file, args=(feed, json_file), name=f"{feed}-listing-watch", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil  # optional: enables the Chrome process-tree RSS check
+except ImportError:
+    psutil = None
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+JS_HEAP_JS = "return (performance.memory && performance.memory.usedJSHeapSize) || null;"
+
+
+# A leased Chrome plus the bookkeeping the pool recycles it by
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.cycles = 0
+        self.created_at = time.time()
+
+
+# Hard cap on live Chrome instances with lease/return semantics. Browsers are recycled after
+# max_cycles or once their process tree / JS heap grows past the limits, and evicted when they
+# fail a liveness check.
+class DriverPool:
+    def __init__(self, create_driver, max_drivers=6, max_cycles=20000, max_rss_mb=2048, max_js_heap_mb=768):
+        self.create_driver = create_driver
+        self.max_drivers = max_drivers
+        self.max_cycles = max_cycles
+        self.max_rss_mb = max_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.slots = threading.BoundedSemaphore(max_drivers)
+        self.idle = []
+        self.lock = threading.Lock()
+        self.created = 0
+        self.recycled = 0
+
+    # Blocks until a slot is free; reuses a healthy idle browser before starting a new one
+    def lease(self, timeout=None):
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No free driver within {timeout}s ({self.max_drivers} in use)")
+        try:
+            while True:
+                with self.lock:
+                    pooled = self.idle.pop() if self.idle else None
+                if pooled is None:
+                    pooled = PooledDriver(self.create_driver())
+                    self.created += 1
+                    return pooled
+                if self.is_alive(pooled) and not self.should_recycle(pooled):
+                    return pooled
+                self.discard(pooled)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, pooled, discard=False):
+        try:
+            if discard or not self.is_alive(pooled) or self.should_recycle(pooled):
+                self.discard(pooled)
+            else:
+                with self.lock:
+                    self.idle.append(pooled)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def leased(self, timeout=None):
+        pooled = self.lease(timeout)
+        try:
+            yield pooled.driver
+        finally:
+            self.release(pooled)
+
+    def discard(self, pooled):
+        self.recycled += 1
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for pooled in idle:
+            self.discard(pooled)
+
+    def is_alive(self, pooled):
+        try:
+            pooled.driver.window_handles
+            return pooled.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def should_recycle(self, pooled):
+        if pooled.cycles >= self.max_cycles:
+            print(f"[{now()}] ♻️ Recycling browser after {pooled.cycles} cycles")
+            return True
+        rss = self.rss_mb(pooled)
+        if rss is not None and rss > self.max_rss_mb:
+            print(f"[{now()}] ♻️ Recycling browser at {rss:.0f} MB RSS")
+            return True
+        heap = self.js_heap_mb(pooled)
+        if heap is not None and heap > self.max_js_heap_mb:
+            print(f"[{now()}] ♻️ Recycling browser at {heap:.0f} MB JS heap")
+            return True
+        return False
+
+    # chromedriver + every Chrome process under it
+    def rss_mb(self, pooled):
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(pooled.driver.service.process.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except Exception:
+            return None
+
+    # Heap of the current tab only; used when psutil isn't installed
+    def js_heap_mb(self, pooled):
+        if psutil is not None:
+            return None
+        try:
+            used = pooled.driver.execute_script(JS_HEAP_JS)
+            return used / (1024 * 1024) if used else None
+        except Exception:
+            return None
+
+
+# Lease from `pool` if given, otherwise run on a private driver that is quit afterwards
+@contextmanager
+def lease_driver(pool, create_driver):
+    if pool is not None:
+        with pool.leased() as driver:
+            yield driver
+        return
+
+    driver = create_driver()
+    try:
+        yield driver
+    finally:
+        driver.quit()
@@ -0,0 +1,219 @@
+# Browserless poller for market endpoints we already know (e.g. captured by network_feed).
+# Chrome is only needed to bootstrap the session and find the endpoints; after that a single
+# asyncio loop with pooled keep-alive connections feeds the same parsers and output files.
+#
+#   python http_replay.py endpoints.json
+#
+# endpoints.json: [{"url": ..., "kind": "wickspin" | "premium", "output_file": ..., "interval": 0.5,
+#                   "headers": {"Cookie": ..., "User-Agent": ...}, "sport": ..., "match": ...}]
+# sport / match (optional) pick the market subscription, see market_subscriptions.py
+
+import asyncio
+import ssl
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import orjson
+
+from network_feed import capture_sections, map_payload, recognised_endpoints
+from WikSpinLiv_2 import save_data_to_json
+from WikSpinLiv_2_Premium import save_premium_data
+from market_subscriptions import subscription_for, select_rows
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+# Minimal HTTP/1.1 GET client on asyncio streams with a keep-alive connection pool per host
+class KeepAliveClient:
+    def __init__(self, max_per_host=4, timeout=10.0):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.idle = {}     # (scheme, host, port) -> [(reader, writer)]
+        self.limits = {}   # (scheme, host, port) -> Semaphore
+        self.requests = 0
+        self.connections_opened = 0
+
+    async def connect(self, scheme, host, port):
+        context = ssl.create_default_context() if scheme == "https" else None
+        self.connections_opened += 1
+        return await asyncio.open_connection(host, port, ssl=context, server_hostname=host if context else None)
+
+    async def get(self, url, headers=None):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        limit = self.limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+
+        async with limit:
+            pooled = self.idle.setdefault(key, [])
+            for attempt in range(2):
+                reused = bool(pooled)
+                reader, writer = pooled.pop() if reused else await self.connect(*key)
+                try:
+                    status, body, keep_alive = await asyncio.wait_for(
+                        self.exchange(reader, writer, parts, path, headers or {}), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    writer.close()
+                    if reused and attempt == 0:
+                        continue  # the server dropped an idle connection; retry on a fresh one
+                    raise
+                self.requests += 1
+                if keep_alive:
+                    pooled.append((reader, writer))
+                else:
+                    writer.close()
+                return status, body
+
+    async def exchange(self, reader, writer, parts, path, headers):
+        head = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive",
+                "Accept: application/json", "Accept-Encoding: identity"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status, response_headers = await self.read_head(reader)
+        while 100 <= status < 200:  # interim responses (100 Continue, 103 Early Hints) precede the real one
+            status, response_headers = await self.read_head(reader)
+        keep_alive = response_headers.get("connection", "").lower() != "close"
+
+        if status in (204, 304):
+            return status, b"", keep_alive  # never carry a body, whatever the headers say
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in response_headers:
+            body = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            # No length: the body runs until the server closes, so the connection can't go back to the pool
+            body = await reader.read()
+            return status, body, False
+        return status, body, keep_alive
+
+    async def read_head(self, reader):
+        status_line = (await reader.readline()).decode("latin-1")
+        if not status_line:
+            raise ConnectionError("connection closed before response")
+        status = int(status_line.split(" ", 2)[1])
+        response_headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        return status, response_headers
+
+    async def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle = {}
+
+
+# Polls every endpoint on its own interval and writes the usual <match>_wickspin.json / _premium.json
+class ReplayPoller:
+    def __init__(self, endpoints, client=None):
+        self.endpoints = endpoints
+        self.client = client or KeepAliveClient()
+        self.snapshots = {}  # output_file -> latest sections from every endpoint feeding it
+
+    # Each poll returns an endpoint's whole view of a section, so it replaces that section's rows outright;
+    # a market or runner the site dropped doesn't linger
+    def apply(self, endpoint, payload):
+        sections = map_payload(payload)
+        if not sections:
+            return False
+        output_file = endpoint["output_file"]
+        snapshot = self.snapshots.setdefault(output_file, {})
+        subscription = subscription_for(endpoint.get("sport"), endpoint.get("match"))
+
+        if endpoint.get("kind") == "premium":
+            if "markets" not in sections:
+                return False
+            snapshot["markets"] = select_rows(sections["markets"], "markets", subscription["markets"])
+            save_premium_data({"timestamp": datetime.utcnow().isoformat() + "Z", "markets": snapshot["markets"]}, output_file)
+        else:
+            sections = {k: v for k, v in sections.items() if k in ("exchange_odds", "fancy_markets")}
+            if not sections:
+                return False
+            snapshot.update(sections)
+            snapshot.setdefault("exchange_odds", [])
+            snapshot["fancy_markets"] = select_rows(snapshot.get("fancy_markets", []), "fancy_markets", subscription["fancy_markets"])
+            save_data_to_json(snapshot, output_file)
+        return True
+
+    async def poll_endpoint(self, endpoint):
+        interval = endpoint.get("interval", 0.5)
+        while True:
+            started = time.monotonic()
+            try:
+                status, body = await self.client.get(endpoint["url"], endpoint.get("headers"))
+                if status == 200:
+                    if not self.apply(endpoint, orjson.loads(body)):
+                        print(f"[{now()}] ⚠️ Unrecognised payload from {endpoint['url']}")
+                else:
+                    print(f"[{now()}] ⚠️ HTTP {status} from {endpoint['url']}")
+            except Exception as e:
+                print(f"[{now()}] ❌ Replay error for {endpoint['url']}: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def run(self):
+        print(f"[{now()}] 🚀 Replaying {len(self.endpoints)} endpoint(s) without a browser")
+        try:
+            await asyncio.gather(*(self.poll_endpoint(endpoint) for endpoint in self.endpoints))
+        finally:
+            await self.client.close()
+
+
+# Cookie + User-Agent of the browser session, so the endpoints answer as they do for the page
+def session_headers(driver):
+    cookies = "; ".join(f"{c['name']}={c['value']}" for c in driver.get_cookies())
+    headers = {"User-Agent": driver.execute_script("return navigator.userAgent;")}
+    if cookies:
+        headers["Cookie"] = cookies
+    return headers
+
+
+# Open the match page once with network capture on and turn the XHR endpoints it used into replay specs.
+# Chrome must be started with network_feed.enable_network_logging(options).
+def bootstrap_endpoints(driver, main_url, wickspin_output, premium_output, settle_seconds=5, interval=0.5):
+    capture_sections(driver, "replay")  # enable Network events before the page loads
+    driver.get(main_url)
+    time.sleep(settle_seconds)
+    capture_sections(driver, "replay")
+
+    headers = session_headers(driver)
+    endpoints = []
+    for url, sections in recognised_endpoints(driver).items():
+        if sections & {"exchange_odds", "fancy_markets"}:
+            endpoints.append({"url": url, "kind": "wickspin", "output_file": wickspin_output,
+                              "interval": interval, "headers": headers})
+        if "markets" in sections:
+            endpoints.append({"url": url, "kind": "premium", "output_file": premium_output,
+                              "interval": interval, "headers": headers})
+    print(f"[{now()}] 🔗 Found {len(endpoints)} replayable endpoint(s) for {main_url}")
+    return endpoints
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python http_replay.py endpoints.json")
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as f:
+        endpoints = orjson.loads(f.read())
+    try:
+        asyncio.run(ReplayPoller(endpoints).run())
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting replay poller.")
@@ -0,0 +1,141 @@
+# Which markets the scrapers read, per sport and per match, instead of "the first five on the page".
+#
+# MARKET_SUBSCRIPTIONS.json (optional; without it every match reads the first 5 of each, as before):
+#
+#   {
+#     "default": {"markets": {"patterns": [".*"], "max": 5}, "fancy_markets": {"patterns": [".*"], "max": 5}},
+#     "sports":  {"Soccer":  {"markets": {"patterns": ["^Match Odds$", "Over/Under 2\\.5", "Goal Line"], "max": 8}}},
+#     "matches": {"India v Australia": {"fancy_markets": {"patterns": ["6 over runs", "Only \\d+ over"], "max": 10}}}
+#   }
+#
+# "markets" are the premium scraper's blocks, "fancy_markets" the fancy scraper's. Patterns are
+# case-insensitive regular expressions over the market title, kept to the syntax Python and JavaScript
+# share since the same spec is applied inside the page. They are in priority order: every market matching
+# the first pattern is taken (in page order), then the second's, and so on up to max. Per section, the
+# match entry wins over the sport entry, which wins over default. The file is re-read when it changes; a
+# version with a bad pattern is rejected whole and the previous subscriptions stay in force.
+
+import os
+import re
+
+import orjson
+
+SUBSCRIPTIONS_FILE = "MARKET_SUBSCRIPTIONS.json"
+DEFAULT_SUBSCRIPTION = {
+    "markets": {"patterns": [".*"], "max": 5},
+    "fancy_markets": {"patterns": [".*"], "max": 5},
+}
+ROW_TITLES = {"markets": "market", "fancy_markets": "title"}
+
+# In-page counterpart of select_rows(); prepended to the extraction scripts.
+# rows: elements in page order, titleOf(row) -> title, spec: {patterns, max} -> chosen rows, priority order
+SELECT_ROWS_JS = """
+const selectRows = (rows, titleOf, spec) => {
+    const chosen = [], taken = new Set();
+    for (const source of spec.patterns) {
+        const pattern = new RegExp(source, "i");
+        for (let i = 0; i < rows.length && chosen.length < spec.max; i++) {
+            if (!taken.has(i) && pattern.test(titleOf(rows[i]))) {
+                taken.add(i);
+                chosen.push(rows[i]);
+            }
+        }
+    }
+    return chosen;
+};
+"""
+
+# Python-only regex syntax that JavaScript rejects or reads differently: named groups, inline flags,
+# comments, lookbehind, \A / \Z anchors
+PYTHON_ONLY_SYNTAX = re.compile(r"\(\?P|\(\?[aiLmsux-]+[:)]|\(\?#|\(\?<[=!]|\\[AZ]")
+
+_loaded = (None, {})  # (mtime of SUBSCRIPTIONS_FILE, parsed spec)
+
+
+# Raises ValueError naming the first entry that would break select_rows or SELECT_ROWS_JS
+def check_subscriptions(spec):
+    entries = [("default", spec.get("default", {}))]
+    entries += [(f"sports.{name}", entry) for name, entry in spec.get("sports", {}).items()]
+    entries += [(f"matches.{name}", entry) for name, entry in spec.get("matches", {}).items()]
+    for where, entry in entries:
+        for section, rule in entry.items():
+            if section not in DEFAULT_SUBSCRIPTION:
+                continue
+            try:
+                int(rule.get("max", 0))
+            except (TypeError, ValueError):
+                raise ValueError(f"{where}.{section}: max {rule.get('max')!r} is not a number")
+            for pattern in rule.get("patterns", []):
+                if not isinstance(pattern, str):
+                    raise ValueError(f"{where}.{section}: pattern {pattern!r} is not a string")
+                try:
+                    re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    raise ValueError(f"{where}.{section}: bad pattern {pattern!r} ({e})")
+                if PYTHON_ONLY_SYNTAX.search(pattern):
+                    raise ValueError(f"{where}.{section}: pattern {pattern!r} uses syntax JavaScript doesn't share")
+
+
+def load_subscriptions():
+    global _loaded
+    try:
+        mtime = os.stat(SUBSCRIPTIONS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _loaded[0]:
+        try:
+            with open(SUBSCRIPTIONS_FILE, "rb") as f:
+                spec = orjson.loads(f.read())
+            check_subscriptions(spec)
+            _loaded = (mtime, spec)
+        except (OSError, orjson.JSONDecodeError, ValueError, AttributeError) as e:
+            print(f"⚠️ Couldn't read {SUBSCRIPTIONS_FILE} ({e}); keeping the previous subscriptions")
+            _loaded = (mtime, _loaded[1])
+    return _loaded[1]
+
+
+# {"markets": {"patterns", "max"}, "fancy_markets": {...}} for one match
+def subscription_for(sport=None, match=None):
+    spec = load_subscriptions()
+    resolved = {}
+    for section, default in DEFAULT_SUBSCRIPTION.items():
+        entry = spec.get("default", {}).get(section, default)
+        entry = spec.get("sports", {}).get(sport, {}).get(section, entry)
+        entry = spec.get("matches", {}).get(match, {}).get(section, entry)
+        resolved[section] = {"patterns": list(entry.get("patterns", default["patterns"])),
+                             "max": int(entry.get("max", default["max"]))}
+    return resolved
+
+
+# Python side of SELECT_ROWS_JS, for rows that arrive by network feed or replay
+def select_rows(rows, section, spec):
+    title_field = ROW_TITLES[section]
+    chosen, taken = [], set()
+    for source in spec["patterns"]:
+        pattern = re.compile(source, re.IGNORECASE)
+        for index, row in enumerate(rows):
+            if len(chosen) >= spec["max"]:
+                return chosen
+            if index not in taken and pattern.search(row.get(title_field) or ""):
+                taken.add(index)
+                chosen.append(row)
+    return chosen
+
+
+# Observer changes worth patching into snapshot. A change to a row we hold is kept; one naming an
+# unsubscribed market, or a subscribed one while the section is already full, is dropped (the periodic
+# resync picks up reordering); the rest (a subscribed market with room for it) still forces a full read.
+def subscribed_changes(snapshot, changes, subscription):
+    kept = []
+    for change in changes:
+        section = change.get("section")
+        spec = subscription.get(section)
+        if spec is None:
+            kept.append(change)
+            continue
+        rows = snapshot.get(section) or []
+        if any(row.get(ROW_TITLES[section]) == change.get("key") for row in rows):
+            kept.append(change)
+        elif len(rows) < spec["max"] and any(re.search(p, change.get("key") or "", re.IGNORECASE) for p in spec["patterns"]):
+            kept.append(change)
+    return kept
@@ -0,0 +1,215 @@
+import time
+from collections import Counter
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import ElementClickInterceptedException
+
+from match_tiers import market_id_of
+
+# Well-known sport ids used in full-market routes, for rows whose state only carries event/market ids
+SPORT_IDS = {"Soccer": "1", "Tennis": "2", "Cricket": "4"}
+
+# Reads the whole sports board in one pass, without navigating. For every .event-block-item-row
+# in every .mb-4 section it tries, in order: a router link / anchor to full-market, then ids found
+# in data-* attributes or the Vue/React state of the row's own elements (never that of a parent list
+# component, whose props would hand every row the same ids). Rows it cannot resolve
+# come back with url = null and keep their section/row index so the caller can fall back to a click.
+# dom_id is whatever stable identity the row exposes (event / market id, element id, data-key), or null.
+DISCOVER_ROWS_JS = """
+const sportIds = arguments[0];
+const text = (el) => (el ? (el.innerText || el.textContent || "").trim() : "");
+const ID_KEYS = {
+    sport: /^(sport_?id|sportid|event_?type_?id|eventtypeid)$/i,
+    event: /^(event_?id|eventid)$/i,
+    market: /^(market_?id|marketid)$/i
+};
+
+const findIds = (obj, found, depth, seen) => {
+    if (!obj || typeof obj !== "object" || depth > 4 || seen.has(obj)) return;
+    seen.add(obj);
+    let keys;
+    try { keys = Object.keys(obj); } catch (e) { return; }
+    for (const key of keys) {
+        let value;
+        try { value = obj[key]; } catch (e) { continue; }
+        if (typeof value === "string" || typeof value === "number") {
+            for (const name in ID_KEYS) {
+                if (found[name] === undefined && ID_KEYS[name].test(key)) found[name] = String(value);
+            }
+        } else if (value && typeof value === "object" && !(value instanceof Node) && value !== window) {
+            findIds(value, found, depth + 1, seen);
+        }
+    }
+};
+
+// Only state that belongs to this element: its own vnode props (Vue 3), a component rooted at it
+// (Vue 2 __vue__ / Vue 3 subTree), its React props
+const statesOf = (el) => {
+    const states = [el.dataset];
+    if (el.__vnode && el.__vnode.props) states.push(el.__vnode.props);
+    if (el.__vue__ && el.__vue__.$el === el) states.push(el.__vue__.$props, el.__vue__.$attrs, el.__vue__.$data);
+    const owner = el.__vueParentComponent;
+    if (owner && owner.subTree && owner.subTree.el === el) states.push(owner.props, owner.attrs);
+    for (const key of Object.keys(el)) {
+        if (key.startsWith("__reactProps$")) states.push(el[key]);
+        else if (key.startsWith("__reactFiber$") && el[key]) states.push(el[key].memoizedProps);
+    }
+    return states;
+};
+
+const identify = (row, sportName) => {
+    const link = row.querySelector("a[href*='full-market']") || row.closest("a[href*='full-market']");
+    if (link) {
+        const href = new URL(link.getAttribute("href"), location.href).href;
+        return {url: href, dom_id: href};
+    }
+
+    const found = {}, seen = new Set();
+    const nodes = [row, ...Array.prototype.slice.call(row.querySelectorAll("*"), 0, 40)];
+    for (const node of nodes) {
+        for (const state of statesOf(node)) findIds(state, found, 0, seen);
+        if (found.event !== undefined && found.market !== undefined && found.sport !== undefined) break;
+    }
+    const sport = found.sport !== undefined ? found.sport : sportIds[sportName];
+    const domId = found.market || found.event || row.id || row.getAttribute("data-key") || null;
+    if (found.event === undefined || found.market === undefined || sport === undefined) return {url: null, dom_id: domId};
+    return {url: `${location.origin}/#/full-market/${sport}-${found.event}?marketId=${found.market}`, dom_id: domId};
+};
+
+const board = [];
+const sections = document.getElementsByClassName("mb-4");
+for (let s = 0; s < sections.length; s++) {
+    const label = sections[s].querySelector(".text-event-tab-icon");
+    if (!label) continue;
+    const sport = text(label);
+    const rows = [];
+    const items = sections[s].querySelectorAll(".event-block-item-row");
+    for (let r = 0; r < items.length; r++) {
+        const row = items[r];
+        const identity = identify(row, sport);
+        rows.push({
+            index: r,
+            match: text(row.querySelector(".truncate")),
+            fancy_bet: !!row.querySelector(".icon-fancybet"),
+            sportsbook: !!row.querySelector(".icon-sportsbook"),
+            url: identity.url,
+            dom_id: identity.dom_id
+        });
+    }
+    board.push({index: s, sport: sport, rows: rows});
+}
+return board;
+"""
+
+
+# [{"index", "sport", "rows": [{"index", "match", "fancy_bet", "sportsbook", "url" or None, "dom_id" or None}]}]
+def discover_rows(driver):
+    return driver.execute_script(DISCOVER_ROWS_JS, SPORT_IDS) or []
+
+
+def safe_click(driver, element, retries=3):
+    for _ in range(retries):
+        try:
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+            time.sleep(1)
+            element.click()
+            return
+        except ElementClickInterceptedException:
+            time.sleep(1)
+    raise ElementClickInterceptedException("Element could not be clicked after multiple attempts.")
+
+
+# Fallback for a row discover_rows couldn't resolve: click it, read the full-market URL, go back
+def resolve_url_by_click(driver, wait, sport_index, match_index):
+    sections = wait.until(EC.presence_of_all_elements_located((By.CLASS_NAME, "mb-4")))
+    match = sections[sport_index].find_elements(By.CSS_SELECTOR, ".event-block-item-row")[match_index]
+
+    # Try to click inner clickable element for better success
+    try:
+        clickable = match.find_element(By.CSS_SELECTOR, ".truncate")
+        if clickable.is_displayed() and clickable.is_enabled():
+            safe_click(driver, clickable)
+        else:
+            driver.execute_script("arguments[0].click();", clickable)
+    except Exception as e:
+        print(f"  Warning: couldn't click inner element, trying outer element: {e}")
+        safe_click(driver, match)
+
+    wait.until(lambda d: "full-market" in d.current_url)
+    current_url = driver.current_url
+
+    driver.back()
+    wait.until(lambda d: d.current_url.startswith("https://www.wickspin24.live/#/sports"))
+    time.sleep(2)
+    return current_url
+
+
+# Board → [{"sport", "matches": [...]}] for the *_MATCHES.json files. URLs come from the page itself,
+# then from the URL cache of earlier passes; only rows neither knows are clicked through. The cache is
+# updated, pruned to the rows on this board and saved.
+def build_listing(driver, wait, cache=None):
+    board = discover_rows(driver)
+    all_sports = []
+    seen = set()
+    from_page = from_cache = clicked = 0
+    # A marketId the page gives to several rows came from shared state, not the rows; click those through
+    shared_ids = Counter(market_id_of(row.get("url")) for section in board for row in section.get("rows") or [] if row.get("url"))
+    shared_ids = {market_id for market_id, count in shared_ids.items() if count > 1}
+
+    for section in board:
+        sport_name = section.get("sport")
+        print(f"Processing sport: {sport_name}")
+
+        sport_data = {
+            "sport": sport_name,
+            "matches": []
+        }
+
+        # One bad section is left out; the rest of the board is still listed
+        try:
+            if cache is not None:
+                # Every row on the board keeps its cached URL, even if one further down fails the section
+                seen.update(cache.key(sport_name, row["match"]) for row in section["rows"])
+            for row in section["rows"]:
+                match_name = row["match"]
+                print(f"  Match: {match_name}")
+
+                current_url = row["url"]
+                shared = bool(current_url) and market_id_of(current_url) in shared_ids
+                if shared:
+                    current_url = None
+                if current_url:
+                    from_page += 1
+                elif not shared and cache is not None and (current_url := cache.get(sport_name, match_name, row.get("dom_id"))):
+                    from_cache += 1
+                else:
+                    # Only rows whose id isn't in the DOM, app state or cache still need the click-through
+                    try:
+                        current_url = resolve_url_by_click(driver, wait, section["index"], row["index"])
+                        clicked += 1
+                    except Exception as e:
+                        print(f"  Error resolving URL for '{match_name}': {e}")
+                        continue
+                if cache is not None:
+                    cache.put(sport_name, match_name, current_url, None if shared else row.get("dom_id"))
+                print(f"    URL: {current_url}")
+
+                sport_data["matches"].append({
+                    "match": match_name,
+                    "url": current_url,
+                    "fancy_bet": row["fancy_bet"],
+                    "sportsbook": row["sportsbook"]
+                })
+        except Exception as e:
+            print(f"  Error processing sport '{sport_name}': {e}")
+            continue
+
+        all_sports.append(sport_data)
+
+    evicted = 0
+    if cache is not None and board:  # an empty board is a failed load, not every match ending
+        evicted = cache.retain(seen)
+        cache.save()
+    print(f"🔎 {from_page} URLs read from the page, {from_cache} from cache, {clicked} clicked through, {evicted} evicted")
+    return all_sports
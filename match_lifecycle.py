@@ -0,0 +1,81 @@
+import threading
+import time
+from datetime import datetime
+
+import orjson
+
+import snapshot_writer
+from odds_history import close_history
+from odds_columns import drop_store
+from WikSpinLiv_2 import forget_output as forget_wickspin_output
+from WikSpinLiv_2_Premium import forget_output as forget_premium_output
+
+# A match missing from discovery for this long is treated as finished; shorter gaps
+# (a discovery pass that missed a row, a page hiccup) keep the worker running
+GRACE_SECONDS = 600
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+# Every per-output-file cache the scrape/publish layers keep for a match
+def release_outputs(output_files):
+    for output_file in output_files:
+        forget_wickspin_output(output_file)
+        forget_premium_output(output_file)
+        snapshot_writer.forget(output_file)
+        close_history(output_file)
+        drop_store(output_file)
+
+
+# Reconciles running match workers against the latest discovery output.
+# listed → missing → (listed again: returned | past the grace period: retired), each step audited
+# as one JSON line {ts, event, match_id, label, ...} in audit_file.
+class MatchLifecycle:
+    def __init__(self, multiplexer, audit_file="match_lifecycle.ndjson", grace_seconds=GRACE_SECONDS):
+        self.multiplexer = multiplexer
+        self.audit_file = audit_file
+        self.grace_seconds = grace_seconds
+        self.matches = {}  # match_id -> {"label", "started_at", "missing_since"}
+        self.lock = threading.Lock()
+
+    def audit(self, event, match_id, **details):
+        record = {"ts": time.time(), "event": event, "match_id": match_id,
+                  "label": self.matches.get(match_id, {}).get("label"), **details}
+        with open(self.audit_file, "ab") as f:
+            f.write(orjson.dumps(record) + b"\n")
+
+    def started(self, match_id, label):
+        with self.lock:
+            self.matches[match_id] = {"label": label, "started_at": time.time(), "missing_since": None}
+            self.audit("started", match_id)
+
+    # listed_ids: every match id the current discovery output lists. Returns the ids retired this pass.
+    def reconcile(self, listed_ids):
+        if not listed_ids:
+            print(f"[{now()}] ⚠️ Discovery listed no matches; not retiring anything this pass")
+            return []
+
+        retired = []
+        with self.lock:
+            for match_id, state in list(self.matches.items()):
+                if match_id in listed_ids:
+                    if state["missing_since"] is not None:
+                        self.audit("returned", match_id, missing_for=round(time.time() - state["missing_since"], 1))
+                        state["missing_since"] = None
+                elif state["missing_since"] is None:
+                    state["missing_since"] = time.time()
+                    self.audit("missing", match_id)
+                elif time.time() - state["missing_since"] >= self.grace_seconds:
+                    self.retire(match_id)
+                    retired.append(match_id)
+        return retired
+
+    def retire(self, match_id):
+        state = self.matches[match_id]
+        self.multiplexer.remove_match(match_id)  # its host releases the outputs once the last cycle is done
+        self.audit("retired", match_id, ran_for=round(time.time() - state["started_at"], 1),
+                   missing_for=round(time.time() - state["missing_since"], 1))
+        del self.matches[match_id]
+        print(f"[{now()}] 🏁 Retired {state['label']}: gone from discovery for {self.grace_seconds}s+")
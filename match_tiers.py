@@ -0,0 +1,26 @@
+import re
+
+import orjson
+
+# Seconds between scrape cycles per tier: in-play odds move constantly, tomorrow's barely
+TIER_INTERVALS = {"IN_PLAY": 0.5, "TODAY": 30.0, "TOMMOROW": 300.0}
+
+
+# Match identity across feeds: the exchange marketId in the full-market URL
+def market_id_of(url):
+    found = re.search(r"marketId=([^&#]+)", url or "")
+    return found.group(1) if found else (url or "")
+
+
+# Market ids currently listed as in-play; a Today/Tomorrow match found here is promoted
+def in_play_market_ids(json_file="IN_PLAY_MATCHES.json"):
+    try:
+        with open(json_file, "rb") as f:
+            data = orjson.loads(f.read())
+    except Exception:
+        return set()
+    return {market_id_of(match.get("url")) for sport_entry in data for match in sport_entry.get("matches", [])}
+
+
+def tier_for(market_id, home_tier, in_play_ids):
+    return "IN_PLAY" if market_id in in_play_ids else home_tier
@@ -0,0 +1,49 @@
+import os
+import time
+
+import orjson
+
+
+# Resolved full-market URLs from earlier discovery passes, persisted per feed
+# (e.g. IN_PLAY_MATCH_URLS.json), so the periodic rerun only navigates for rows it hasn't seen.
+# Keyed by sport + match name; a row exposing a DOM identity must also match the one stored,
+# so a re-used name (same fixture, new event) is resolved again. Rows missing from a pass are evicted.
+class MatchUrlCache:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # "sport|match" -> {"url", "dom_id", "resolved_at"}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, "rb") as f:
+                self.entries = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            pass
+
+    @staticmethod
+    def key(sport, match):
+        return f"{sport}|{match}"
+
+    def get(self, sport, match, dom_id=None):
+        entry = self.entries.get(self.key(sport, match))
+        if entry is None or (dom_id and entry.get("dom_id") and entry["dom_id"] != dom_id):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["url"]
+
+    def put(self, sport, match, url, dom_id=None):
+        self.entries[self.key(sport, match)] = {"url": url, "dom_id": dom_id, "resolved_at": time.time()}
+
+    # Drops every entry whose row wasn't on the board this pass; returns how many went
+    def retain(self, seen_keys):
+        stale = [key for key in self.entries if key not in seen_keys]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def save(self):
+        temp = f"{self.path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(orjson.dumps(self.entries, option=orjson.OPT_INDENT_2))
+        os.replace(temp, self.path)
@@ -0,0 +1,305 @@
+import base64
+import json
+import re
+import weakref
+
+from odds_observer import ROW_KEYS
+
+# CDP events we keep from Chrome's performance log
+FEED_METHODS = {"Network.webSocketFrameReceived", "Network.responseReceived", "Network.loadingFinished"}
+MAX_PENDING_EVENTS = 2000  # per tab; oldest dropped if a tab isn't drained for a while
+# Payloads we couldn't map only count as "unrecognised" (→ DOM fallback) if they look like odds data,
+# so heartbeats and config responses don't force a DOM read every tick
+ODDS_HINT = re.compile(r'"[^"]*(odds|price|rate|runner|market|fancy|selection)[^"]*"\s*:', re.IGNORECASE)
+
+RUNNER_NAME_KEYS = ("runnerName", "selectionName", "name", "team")
+BACK_KEYS = ("back", "availableToBack", "backPrices")
+LAY_KEYS = ("lay", "availableToLay", "layPrices")
+FANCY_LIST_KEYS = ("fancy", "fancyMarkets", "fancyBets", "sessions")
+MARKET_LIST_KEYS = ("markets", "sportsbookMarkets", "premiumMarkets")
+SELECTION_LIST_KEYS = ("selections", "outcomes", "bets", "runners")
+
+
+# Chrome must be started with performance logging for this backend:
+#   enable_network_logging(options); webdriver.Chrome(options=options)
+def enable_network_logging(options):
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+# --- Payload → our schema -------------------------------------------------
+
+# Same text the site renders: "2.62", "1000"
+def format_odds(value):
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (int, float)):
+        return f"{value:g}" if value < 1e6 else f"{value:.0f}"
+    return str(value)
+
+
+# Same text the site renders: "38,269.77"
+def format_volume(value):
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (int, float)):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def first_key(item, keys, default=None):
+    for key in keys:
+        if key in item and item[key] is not None:
+            return item[key]
+    return default
+
+
+# Best level of a price ladder: [{"price", "size"}], [[price, size]] or a single {"odds", "volume"}
+def best_level(ladder):
+    if isinstance(ladder, dict):
+        ladder = [ladder]
+    if not isinstance(ladder, list) or not ladder:
+        return {"odds": "", "volume": ""}
+    level = ladder[0]
+    if isinstance(level, (list, tuple)):
+        price, size = (list(level) + [None, None])[:2]
+    elif isinstance(level, dict):
+        price = first_key(level, ("price", "odds", "rate"))
+        size = first_key(level, ("size", "volume", "amount"))
+    else:
+        price, size = level, None
+    return {"odds": format_odds(price), "volume": format_volume(size)}
+
+
+def is_exchange_runner(item):
+    return isinstance(item, dict) and first_key(item, RUNNER_NAME_KEYS) is not None \
+        and (first_key(item, BACK_KEYS) is not None or first_key(item, LAY_KEYS) is not None)
+
+
+def map_runner(item):
+    return {
+        "team": str(first_key(item, RUNNER_NAME_KEYS)),
+        "back": best_level(first_key(item, BACK_KEYS)),
+        "lay": best_level(first_key(item, LAY_KEYS)),
+    }
+
+
+def map_fancy(item):
+    if not isinstance(item, dict):
+        return None
+    title = first_key(item, ("title", "name", "marketName", "runnerName"))
+    if title is None:
+        return None
+    status = str(first_key(item, ("status", "statusName"), "Active"))
+    market = {"title": str(title), "status": status}
+    if status.lower() == "suspend":
+        market["no"] = {"odds": None, "value": None}
+        market["yes"] = {"odds": None, "value": None}
+        return market
+    for side, odds_keys, value_keys in (
+        ("no", ("noRate", "layPrice", "no_odds"), ("noValue", "laySize", "no_value")),
+        ("yes", ("yesRate", "backPrice", "yes_odds"), ("yesValue", "backSize", "yes_value")),
+    ):
+        nested = item.get(side) if isinstance(item.get(side), dict) else {}
+        odds = first_key(nested, ("odds", "rate", "price")) if nested else first_key(item, odds_keys)
+        value = first_key(nested, ("value", "size")) if nested else first_key(item, value_keys)
+        market[side] = {"odds": format_odds(odds) or "N/A", "value": format_odds(value) or "N/A"}
+    return market
+
+
+def map_market(item):
+    if not isinstance(item, dict):
+        return None
+    title = first_key(item, ("market", "marketName", "name", "title"))
+    selections = first_key(item, SELECTION_LIST_KEYS)
+    if title is None or not isinstance(selections, list):
+        return None
+    status = str(first_key(item, ("status",), "active")).lower()
+    status = "suspended" if status.startswith("susp") else "active"
+    bets = []
+    for selection in selections:
+        if not isinstance(selection, dict) or is_exchange_runner(selection):
+            return None  # a ladder means this is an exchange market, not a sportsbook one
+        label = first_key(selection, ("bet", "name", "selectionName", "outcomeName"))
+        odds = first_key(selection, ("odds", "price", "rate"))
+        if label is None or odds is None:
+            continue
+        bets.append({"bet": str(label), "odds": format_odds(odds), "status": status})
+    return {"market": str(title), "bets": bets}
+
+
+def collect_sections(node, sections, depth=0):
+    if depth > 5:
+        return
+    if isinstance(node, list):
+        for item in node:
+            collect_sections(item, sections, depth + 1)
+        return
+    if not isinstance(node, dict):
+        return
+
+    runners = node.get("runners")
+    if isinstance(runners, list) and runners and all(is_exchange_runner(r) for r in runners):
+        sections.setdefault("exchange_odds", []).extend(map_runner(r) for r in runners)
+        return
+
+    consumed = set()
+    for section, list_keys, mapper in (("fancy_markets", FANCY_LIST_KEYS, map_fancy),
+                                       ("markets", MARKET_LIST_KEYS, map_market)):
+        for key in list_keys:
+            if isinstance(node.get(key), list):
+                rows = [row for row in map(mapper, node[key]) if row]
+                if rows:
+                    sections.setdefault(section, []).extend(rows)
+                    consumed.add(key)
+
+    for key, value in node.items():
+        if key not in consumed and isinstance(value, (dict, list)):
+            collect_sections(value, sections, depth + 1)
+
+
+# {"exchange_odds": [...], "fancy_markets": [...], "markets": [...]} (any subset), or None if unrecognised
+def map_payload(payload):
+    sections = {}
+    collect_sections(payload, sections)
+    return sections or None
+
+
+# Upserts feed rows into the snapshot by row key (team / title / market), keeping row order
+def merge_sections(snapshot, sections):
+    for section, rows in sections.items():
+        key_field = ROW_KEYS[section]
+        current = snapshot.setdefault(section, [])
+        positions = {row.get(key_field): index for index, row in enumerate(current)}
+        for row in rows:
+            index = positions.get(row[key_field])
+            if index is None:
+                positions[row[key_field]] = len(current)
+                current.append(row)
+            else:
+                current[index] = row
+
+
+# --- Reading the network traffic -----------------------------------------
+
+def decode_json(text):
+    if not text:
+        return None
+    text = text.lstrip("0123456789")  # socket.io style frames: 42["odds", {...}]
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+# One per driver: the performance log is browser-wide, so entries are sorted into per-tab buffers
+# and each tab only decodes its own when it's the active one. The decoded payloads are then copied
+# into one buffer per consumer of that tab (the fancy and the premium scraper share a page), so
+# whichever drains first doesn't take the other's feed.
+class NetworkFeed:
+    def __init__(self, driver):
+        self.driver = driver
+        self.enabled = set()
+        self.pending = {}
+        self.consumers = {}  # window handle -> {consumer: [(timestamp_ms, source_url, payload)]}
+        self.json_requests = {}
+        self.endpoints = {}  # XHR/fetch URL -> sections its payloads mapped to
+
+    def read_log(self):
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            raise RuntimeError("Network capture needs Chrome started with enable_network_logging(options)") from e
+        for entry in entries:
+            message = json.loads(entry["message"])
+            event = message.get("message", {})
+            if event.get("method") not in FEED_METHODS:
+                continue
+            queue = self.pending.setdefault(message.get("webview"), [])
+            queue.append((entry["timestamp"], event))
+            if len(queue) > MAX_PENDING_EVENTS:
+                del queue[:len(queue) - MAX_PENDING_EVENTS]
+
+    # [(timestamp_ms, source_url, payload)] the current tab received since `consumer`'s last call
+    def drain(self, consumer):
+        handle = self.driver.current_window_handle
+        if handle not in self.enabled:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.enabled.add(handle)
+
+        self.read_log()
+        target = handle.replace("CDwindow-", "")
+        events = self.pending.pop(target, []) + self.pending.pop(None, [])
+        decoded = self.decode(events)
+        buffers = self.consumers.setdefault(handle, {})
+        buffers.setdefault(consumer, [])
+        for buffer in buffers.values():
+            buffer.extend(decoded)
+            if len(buffer) > MAX_PENDING_EVENTS:
+                del buffer[:len(buffer) - MAX_PENDING_EVENTS]
+        payloads, buffers[consumer] = buffers[consumer], []
+        return payloads
+
+    # CDP events -> [(timestamp_ms, source_url, payload)]; response bodies are fetched once per event
+    def decode(self, events):
+        payloads = []
+        for ts, event in events:
+            params = event.get("params", {})
+            method = event["method"]
+            if method == "Network.webSocketFrameReceived":
+                payload = decode_json(params.get("response", {}).get("payloadData"))
+                if payload is not None:
+                    payloads.append((ts, "websocket", payload))
+            elif method == "Network.responseReceived":
+                response = params.get("response", {})
+                if params.get("type") in ("XHR", "Fetch") and "json" in response.get("mimeType", ""):
+                    self.json_requests[params.get("requestId")] = response.get("url")
+            elif method == "Network.loadingFinished":
+                url = self.json_requests.pop(params.get("requestId"), None)
+                if url is None:
+                    continue
+                try:
+                    body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                except Exception:
+                    continue
+                text = body.get("body", "")
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8", "replace")
+                payload = decode_json(text)
+                if payload is not None:
+                    payloads.append((ts, url, payload))
+        return payloads
+
+
+_feeds = weakref.WeakKeyDictionary()
+
+
+def feed_for(driver):
+    feed = _feeds.get(driver)
+    if feed is None:
+        feed = _feeds[driver] = NetworkFeed(driver)
+    return feed
+
+
+# Decodes everything the current tab received since `consumer` ("wickspin", "premium", ...) last asked.
+# Returns (sections, latest payload timestamp in ms or None, number of unrecognised payloads).
+def capture_sections(driver, consumer):
+    sections, latest_ts, unrecognised = {}, None, 0
+    feed = feed_for(driver)
+    for ts, url, payload in feed.drain(consumer):
+        mapped = map_payload(payload)
+        if mapped is None:
+            if ODDS_HINT.search(json.dumps(payload)):
+                unrecognised += 1
+            continue
+        if url != "websocket":
+            feed.endpoints.setdefault(url, set()).update(mapped)
+        for section, rows in mapped.items():
+            sections.setdefault(section, []).extend(rows)
+        latest_ts = ts
+    return sections, latest_ts, unrecognised
+
+
+# XHR/fetch endpoints seen so far whose payloads we could map: {url: {"exchange_odds", ...}}
+def recognised_endpoints(driver):
+    return {url: set(sections) for url, sections in feed_for(driver).endpoints.items()}
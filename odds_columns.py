@@ -0,0 +1,267 @@
+# Columnar odds history: every selection's time series as typed, append-only column files that are
+# read back as NumPy memmaps, so "odds for X between T1 and T2" is a searchsorted + mask, not a JSON parse.
+#
+#   <match>_wickspin.columns/series.json    series key -> id, e.g. "exchange_odds|Team A": 0
+#   <match>_wickspin.columns/<column>.bin   one raw array per column, one row per selection per snapshot
+#
+# Series keys: "exchange_odds|<team>", "fancy_markets|<title>", "markets|<market>|<bet>".
+# Missing / "N/A" / suspended prices are NaN.
+#
+#   python odds_columns.py IN_PLAY_Scrapped/Cricket/<match>_wickspin.json            list series
+#   python odds_columns.py <match>_wickspin.json --parquet out.parquet              export (needs pyarrow)
+
+import argparse
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import orjson
+
+try:
+    import pyarrow as pa  # optional: Parquet export
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+COLUMNS = {
+    "ts": np.float64,
+    "series": np.int32,
+    "back_odds": np.float64,
+    "back_volume": np.float64,
+    "lay_odds": np.float64,
+    "lay_volume": np.float64,
+    "no_odds": np.float64,
+    "no_value": np.float64,
+    "yes_odds": np.float64,
+    "yes_value": np.float64,
+    "odds": np.float64,
+    "suspended": np.uint8,
+}
+VALUE_COLUMNS = [name for name in COLUMNS if name not in ("ts", "series")]
+
+
+# "38,269.77" → 38269.77; "", "N/A", None → NaN
+def to_number(text):
+    if text is None:
+        return np.nan
+    try:
+        return float(str(text).replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+def is_suspended(status):
+    return str(status or "").lower().startswith("susp")
+
+
+# (series key, {column: value}) for every selection in a wickspin or premium snapshot
+def snapshot_rows(data):
+    for runner in data.get("exchange_odds") or []:
+        yield f"exchange_odds|{runner.get('team')}", {
+            "back_odds": to_number(runner.get("back", {}).get("odds")),
+            "back_volume": to_number(runner.get("back", {}).get("volume")),
+            "lay_odds": to_number(runner.get("lay", {}).get("odds")),
+            "lay_volume": to_number(runner.get("lay", {}).get("volume")),
+        }
+    for market in data.get("fancy_markets") or []:
+        yield f"fancy_markets|{market.get('title')}", {
+            "no_odds": to_number((market.get("no") or {}).get("odds")),
+            "no_value": to_number((market.get("no") or {}).get("value")),
+            "yes_odds": to_number((market.get("yes") or {}).get("odds")),
+            "yes_value": to_number((market.get("yes") or {}).get("value")),
+            "suspended": is_suspended(market.get("status")),
+        }
+    for market in data.get("markets") or []:
+        for bet in market.get("bets") or []:
+            yield f"markets|{market.get('market')}|{bet.get('bet')}", {
+                "odds": to_number(bet.get("odds")),
+                "suspended": is_suspended(bet.get("status")),
+            }
+
+
+def columns_dir(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}.columns")
+
+
+class ColumnStore:
+    def __init__(self, output_file):
+        self.path = columns_dir(output_file)
+        self.lock = threading.Lock()
+        self.series_ids = self.read_series()
+        self.files = None  # column -> append handle, kept open between writes
+
+    def read_series(self):
+        try:
+            with open(self.path / "series.json", "rb") as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+
+    def write_series(self):
+        temp = self.path / "series.json.tmp"
+        with open(temp, "wb") as f:
+            f.write(orjson.dumps(self.series_ids))
+        os.replace(temp, self.path / "series.json")
+
+    # Opens every column file for appending, first cutting them all to the rows every column has,
+    # so a write a crash left half done doesn't shift one column against the others
+    def open_files(self):
+        sizes = {}
+        for column, dtype in COLUMNS.items():
+            file = self.path / f"{column}.bin"
+            sizes[column] = (file.stat().st_size if file.exists() else 0, np.dtype(dtype).itemsize)
+        rows = min(size // itemsize for size, itemsize in sizes.values())
+        for column, (size, itemsize) in sizes.items():
+            if size != rows * itemsize:
+                os.truncate(self.path / f"{column}.bin", rows * itemsize)
+        self.files = {column: open(self.path / f"{column}.bin", "ab") for column in COLUMNS}
+
+    def close(self):
+        with self.lock:
+            self.close_files()
+
+    def close_files(self):
+        for f in (self.files or {}).values():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self.files = None
+
+    # One row per selection, appended to every column file
+    def append(self, data, ts=None):
+        ts = time.time() if ts is None else ts
+        rows = list(snapshot_rows(data))
+        if not rows:
+            return 0
+        with self.lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            new_series = False
+            for key, _ in rows:
+                if key not in self.series_ids:
+                    self.series_ids[key] = len(self.series_ids)
+                    new_series = True
+            if new_series:
+                self.write_series()  # before the rows, so every stored id always resolves
+
+            batch = {
+                "ts": np.full(len(rows), ts, dtype=COLUMNS["ts"]),
+                "series": np.array([self.series_ids[key] for key, _ in rows], dtype=COLUMNS["series"]),
+            }
+            for column in VALUE_COLUMNS:
+                default = 0 if column == "suspended" else np.nan
+                batch[column] = np.array([values.get(column, default) for _, values in rows], dtype=COLUMNS[column])
+            if self.files is None:
+                self.open_files()
+            try:
+                for column, values in batch.items():
+                    values.tofile(self.files[column])
+                for f in self.files.values():
+                    f.flush()
+            except BaseException:
+                self.close_files()  # reopening realigns the columns before the next write
+                raise
+        return len(rows)
+
+    # Every column as a read-only memmap, cut to the rows all columns have (a crash can leave one short)
+    def load(self):
+        arrays = {}
+        for column, dtype in COLUMNS.items():
+            file = self.path / f"{column}.bin"
+            size = file.stat().st_size if file.exists() else 0
+            arrays[column] = np.memmap(file, dtype=dtype, mode="r") if size else np.empty(0, dtype=dtype)
+        rows = min(len(values) for values in arrays.values())
+        return {column: values[:rows] for column, values in arrays.items()}
+
+    def series_id(self, key):
+        self.series_ids = self.read_series()
+        if key not in self.series_ids:
+            raise KeyError(f"No series '{key}' in {self.path}")
+        return self.series_ids[key]
+
+    # All rows of one series with start <= ts <= end, as {column: array}
+    def query(self, key, start=None, end=None, columns=None):
+        series_id = self.series_id(key)
+        arrays = self.load()
+        ts = arrays["ts"]
+        low = 0 if start is None else np.searchsorted(ts, start, side="left")
+        high = len(ts) if end is None else np.searchsorted(ts, end, side="right")
+        rows = low + np.flatnonzero(arrays["series"][low:high] == series_id)
+        return {column: np.asarray(arrays[column][rows]) for column in ["ts"] + (columns or VALUE_COLUMNS)}
+
+    # Last recorded values of a series at or before `at`, or None if it had none yet
+    def as_of(self, key, at, columns=None):
+        series_id = self.series_id(key)
+        arrays = self.load()
+        high = np.searchsorted(arrays["ts"], at, side="right")
+        rows = np.flatnonzero(arrays["series"][:high] == series_id)
+        if not len(rows):
+            return None
+        row = rows[-1]
+        return {column: arrays[column][row].item() for column in ["ts"] + (columns or VALUE_COLUMNS)}
+
+    # Values of a series on a regular grid start, start+step, ... <= end, carrying the last value forward
+    def resample(self, key, step, start, end, columns=None):
+        columns = columns or VALUE_COLUMNS
+        history = self.query(key, None, end, columns)
+        grid = np.arange(start, end + step / 2, step)
+        positions = np.searchsorted(history["ts"], grid, side="right") - 1
+        known = positions >= 0
+        resampled = {"ts": grid}
+        for column in columns:
+            values = np.full(len(grid), np.nan)
+            values[known] = history[column][positions[known]]
+            resampled[column] = values
+        return resampled
+
+    def to_parquet(self, target):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+        arrays = self.load()
+        names = {series_id: key for key, series_id in self.read_series().items()}
+        table = pa.table({column: np.asarray(values) for column, values in arrays.items()})
+        table = table.append_column("key", pa.array([names.get(i) for i in arrays["series"].tolist()]))
+        pq.write_table(table, target)
+        return table.num_rows
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(output_file):
+    key = str(output_file)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ColumnStore(output_file)
+        return store
+
+
+def append_columns(output_file, data):
+    return store_for(output_file).append(data)
+
+
+def drop_store(output_file):
+    with _stores_lock:
+        store = _stores.pop(str(output_file), None)
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or export the columnar odds history of a snapshot file")
+    parser.add_argument("output_file")
+    parser.add_argument("--parquet", help="write every row to this Parquet file")
+    args = parser.parse_args()
+    store = ColumnStore(args.output_file)
+    if args.parquet:
+        print(f"✅ {store.to_parquet(args.parquet)} rows written to {args.parquet}")
+    else:
+        arrays = store.load()
+        counts = np.bincount(arrays["series"], minlength=len(store.series_ids))
+        for key, series_id in store.series_ids.items():
+            print(f"{series_id:>5}  {counts[series_id]:>8} rows  {key}")
@@ -0,0 +1,99 @@
+# Structured change events between two snapshots of a match, and an in-process pub/sub bus for them.
+#
+#   {"type": "price",   "section": "exchange_odds", "market": "", "selection": "Team A", "field": "back.odds", "old": "2.62", "new": "2.58"}
+#   {"type": "status",  "section": "fancy_markets", "market": "6 over runs", "selection": "", "field": "status", "old": "Active", "new": "SUSPEND"}
+#   {"type": "added" / "removed", ..., "values": {...}}
+#
+# Each subscriber has a bounded queue. A subscriber that falls behind never slows the producer:
+# its backlog is dropped and replaced by one {"type": "resync", "dropped": n} event, after which it
+# should re-read the snapshot (e.g. GET /snapshots/...) and carry on from the live events.
+
+import asyncio
+
+MAX_SUBSCRIBER_BACKLOG = 1000
+
+
+# {(section, market, selection): {field: value}} for a wickspin or premium snapshot
+def flatten_rows(data):
+    rows = {}
+    for runner in (data or {}).get("exchange_odds") or []:
+        rows[("exchange_odds", "", runner.get("team"))] = {
+            f"{side}.{field}": (runner.get(side) or {}).get(field)
+            for side in ("back", "lay") for field in ("odds", "volume")
+        }
+    for market in (data or {}).get("fancy_markets") or []:
+        values = {"status": market.get("status")}
+        for side in ("no", "yes"):
+            for field in ("odds", "value"):
+                values[f"{side}.{field}"] = (market.get(side) or {}).get(field)
+        rows[("fancy_markets", market.get("title"), "")] = values
+    for market in (data or {}).get("markets") or []:
+        for bet in market.get("bets") or []:
+            rows[("markets", market.get("market"), bet.get("bet"))] = {"odds": bet.get("odds"), "status": bet.get("status")}
+    return rows
+
+
+def diff_snapshots(old, new):
+    before, after = flatten_rows(old), flatten_rows(new)
+    events = []
+    for key, values in after.items():
+        section, market, selection = key
+        previous = before.get(key)
+        if previous is None:
+            events.append({"type": "added", "section": section, "market": market, "selection": selection, "values": values})
+            continue
+        for field, value in values.items():
+            if previous.get(field) != value:
+                events.append({"type": "status" if field == "status" else "price", "section": section, "market": market,
+                               "selection": selection, "field": field, "old": previous.get(field), "new": value})
+    for key, values in before.items():
+        if key not in after:
+            section, market, selection = key
+            events.append({"type": "removed", "section": section, "market": market, "selection": selection, "values": values})
+    return events
+
+
+class Subscription:
+    def __init__(self, bus, filters, max_backlog):
+        self.bus = bus
+        self.filters = filters
+        self.queue = asyncio.Queue(max_backlog)
+        self.dropped = 0
+
+    def offer(self, event):
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "dropped": self.dropped})
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if event.get("type") == "resync":
+            self.dropped = 0
+        return event
+
+    def close(self):
+        self.bus.subscribers.discard(self)
+
+
+# Lives on one event loop; publish() from other threads via loop.call_soon_threadsafe
+class EventBus:
+    def __init__(self, max_backlog=MAX_SUBSCRIBER_BACKLOG):
+        self.max_backlog = max_backlog
+        self.subscribers = set()
+        self.published = 0
+
+    # filters: any of feed / sport / match / section / type, e.g. {"sport": "Cricket", "type": "status"}
+    def subscribe(self, filters=None):
+        subscription = Subscription(self, filters or {}, self.max_backlog)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def publish(self, events):
+        for event in events:
+            self.published += 1
+            for subscription in list(self.subscribers):
+                if all(event.get(name) == value for name, value in subscription.filters.items()):
+                    subscription.offer(event)
@@ -0,0 +1,131 @@
+# Append-only odds history next to each "latest" snapshot file.
+#
+#   <match>_wickspin.json                          latest snapshot (unchanged, for existing consumers)
+#   <match>_wickspin.history.ndjson                current segment, one {"ts", "data"} record per line
+#   <match>_wickspin.history.<YYYYmmdd-HHMMSS>.<seq>.ndjson   rotated segments, named by when they were opened
+#
+#   python odds_history.py IN_PLAY_Scrapped/Cricket/<match>_wickspin.json [--since EPOCH] [--until EPOCH]
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+MAX_SEGMENT_SECONDS = 6 * 3600
+
+
+def history_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}.history.ndjson")
+
+
+# Rotated segments oldest first, then the live one
+def segment_paths(output_file):
+    live = history_path(output_file)
+    rotated = sorted(live.parent.glob(f"{live.stem}.*.ndjson"))
+    return rotated + ([live] if live.exists() else [])
+
+
+class HistoryLog:
+    def __init__(self, output_file, max_bytes=MAX_SEGMENT_BYTES, max_seconds=MAX_SEGMENT_SECONDS):
+        self.path = history_path(output_file)
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.file = None
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        self.file = open(self.path, "ab")
+        self.opened_at = time.time()
+        if self.file.tell():  # a segment left by an earlier run keeps its age from its first record
+            with open(self.path, "rb") as f:
+                try:
+                    self.opened_at = orjson.loads(f.readline())["ts"]
+                except Exception:
+                    pass
+
+    def rotate(self):
+        self.file.close()
+        self.file = None
+        stamp = datetime.fromtimestamp(self.opened_at).strftime("%Y%m%d-%H%M%S")
+        sequence = 0
+        target = self.path.with_name(f"{self.path.stem}.{stamp}.{sequence:04d}.ndjson")
+        while target.exists():
+            sequence += 1
+            target = self.path.with_name(f"{self.path.stem}.{stamp}.{sequence:04d}.ndjson")
+        os.replace(self.path, target)
+
+    def append(self, data, ts=None):
+        ts = time.time() if ts is None else ts
+        line = orjson.dumps({"ts": ts, "data": data}) + b"\n"
+        with self.lock:
+            if self.file is None:
+                self.open()
+            if self.file.tell() and (self.file.tell() + len(line) > self.max_bytes
+                                     or ts - self.opened_at >= self.max_seconds):
+                self.rotate()
+                self.open()
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def history_for(output_file):
+    key = str(output_file)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = _logs[key] = HistoryLog(output_file)
+        return log
+
+
+def append_history(output_file, data):
+    history_for(output_file).append(data)
+
+
+def close_history(output_file):
+    with _logs_lock:
+        log = _logs.pop(str(output_file), None)
+    if log is not None:
+        log.close()
+
+
+# Streams {"ts", "data"} records oldest first, one line in memory at a time
+def read_history(output_file, since=None, until=None):
+    for segment in segment_paths(output_file):
+        with open(segment, "rb") as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn last line of a segment still being written
+                if since is not None and record["ts"] < since:
+                    continue
+                if until is not None and record["ts"] > until:
+                    return
+                yield record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the odds history recorded for a snapshot file")
+    parser.add_argument("output_file")
+    parser.add_argument("--since", type=float)
+    parser.add_argument("--until", type=float)
+    args = parser.parse_args()
+    for record in read_history(args.output_file, args.since, args.until):
+        print(orjson.dumps(record).decode())
@@ -0,0 +1,136 @@
+import time
+
+MAX_QUEUED_CHANGES = 5000  # page-side cap; past this the queue is dropped and we resync with a full read
+RESYNC_SECONDS = 30  # full re-read at least this often anyway, to pick up markets added/removed since
+
+# Installs (once per document) a MutationObserver over the market panels and drains what it queued.
+# arguments[0] = consumer name, arguments[1] = {section: max rows watched}, arguments[2] = queue cap.
+# Each consumer (the fancy scraper, the premium scraper) gets its own queue on the shared page.
+# Every change is queued as the full row it belongs to, serialized at the moment the browser saw it,
+# so Python can patch its snapshot row by row without re-reading the page.
+OBSERVE_JS = """
+const consumer = arguments[0], limits = arguments[1], maxQueued = arguments[2];
+
+if (!window.__oddsObserver) {
+    const text = (el) => (el ? (el.innerText || el.textContent || "").trim() : "");
+    const first = (root, sel) => (root ? root.querySelector(sel) : null);
+    const stamp = () => performance.timeOrigin + performance.now();
+
+    const SECTIONS = [
+        ["exchange_odds", ".exchange_panel_line", "team", (line) => {
+            const h2 = first(line, "h2"), back = first(line, "div[title='BACK']"), lay = first(line, "div[title='LAY']");
+            if (!h2 || !back || !lay) return null;
+            return {
+                team: text(h2).split("\\n")[0],
+                back: {odds: text(first(back, "h3")), volume: text(first(back, "p"))},
+                lay: {odds: text(first(lay, "h3")), volume: text(first(lay, "p"))}
+            };
+        }],
+        ["fancy_markets", "div.mb-1px.px-1.relative", "title", (container) => {
+            const h2 = first(container, "h2");
+            if (!h2) return null;
+            const statusEl = first(container, 'div[data-testid="fancybet-market-status"]');
+            const status = statusEl ? text(statusEl) : "Active";
+            const market = {title: text(h2), status: status};
+            for (const side of ["NO", "YES"]) {
+                const option = first(container, `div[title="${side}"]`);
+                market[side.toLowerCase()] = status.toLowerCase() === "suspend"
+                    ? {odds: null, value: null}
+                    : {odds: text(first(option, "h3")) || "N/A", value: text(first(option, "p")) || "N/A"};
+            }
+            return market;
+        }],
+        ["markets", "div.mb-1", "market", (block) => {
+            const title = first(block, "div.relative.py-2.pl-0 > span.text-13.font-bold");
+            if (!title) return null;
+            const overlay = first(block, "div.absolute.w-full.h-full");
+            const status = overlay && !(overlay.getAttribute("style") || "").includes("display: none") ? "suspended" : "active";
+            const bets = [];
+            for (const box of block.querySelectorAll("div.grid.grid-cols-2 > div[title='back']")) {
+                const label = first(box, "p.text-9"), odds = first(box, "p.text-15");
+                if (label && odds) bets.push({bet: text(label), odds: text(odds), status: status});
+            }
+            return {market: text(title), bets: bets};
+        }]
+    ];
+    const ROWS = SECTIONS.map((section) => section[1]).join(", ");
+
+    window.__oddsConsumers = {};
+    window.__oddsObserver = new MutationObserver((mutations) => {
+        const ts = stamp();
+        const rows = new Set();
+        for (const m of mutations) {
+            const node = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+            const row = node && node.closest(ROWS);
+            if (row) rows.add(row);
+        }
+        for (const row of rows) {
+            const [section, selector, keyField, serialize] = SECTIONS.find((s) => row.matches(s[1]));
+            const index = Array.prototype.indexOf.call(document.querySelectorAll(selector), row);
+            let value;
+            for (const name in window.__oddsConsumers) {
+                const c = window.__oddsConsumers[name];
+                // Only rows inside the same window the consumer's full read covers are reported
+                if (!(section in c.limits) || index >= c.limits[section]) continue;
+                if (value === undefined) value = serialize(row);
+                if (!value) break;
+                c.queue.push({section: section, key: value[keyField], value: value, ts: ts});
+                if (c.queue.length > c.maxQueued) {
+                    c.queue = [];
+                    c.overflow = true;
+                }
+            }
+        }
+    });
+    window.__oddsObserver.observe(document.body, {
+        subtree: true, childList: true, characterData: true,
+        attributes: true, attributeFilter: ["style", "class", "title"]
+    });
+}
+
+let c = window.__oddsConsumers[consumer];
+const installedNow = !c;
+if (installedNow) c = window.__oddsConsumers[consumer] = {queue: [], overflow: false};
+c.limits = limits;
+c.maxQueued = maxQueued;
+
+const changes = c.queue, overflow = c.overflow;
+c.queue = [];
+c.overflow = false;
+return {installed_now: installedNow, overflow: overflow, href: location.href, changes: changes};
+"""
+
+ROW_KEYS = {"exchange_odds": "team", "fancy_markets": "title", "markets": "market"}
+
+
+# Arms the observer for `consumer` if this document doesn't have it yet and returns everything queued
+# for it since the last call. `limits` maps section -> how many leading rows of that section to watch.
+def drain_changes(driver, consumer, limits):
+    result = driver.execute_script(OBSERVE_JS, consumer, limits, MAX_QUEUED_CHANGES) or {}
+    result.setdefault("installed_now", True)
+    result.setdefault("overflow", False)
+    result.setdefault("changes", [])
+    return result
+
+
+# Patches snapshot rows in place, oldest change first. Returns False when a change names a row the
+# snapshot doesn't have (markets added/reordered), meaning the caller should do a full re-read.
+def apply_changes(snapshot, changes):
+    for change in changes:
+        section = change.get("section")
+        rows = snapshot.get(section)
+        if rows is None:
+            continue
+        key_field = ROW_KEYS[section]
+        for index, row in enumerate(rows):
+            if row.get(key_field) == change.get("key"):
+                rows[index] = change["value"]
+                break
+        else:
+            return False
+    return True
+
+
+# Browser-side timestamp (epoch ms) -> seconds of delay until Python picked the change up
+def capture_lag(change):
+    return max(0.0, time.time() - change.get("ts", 0) / 1000.0)
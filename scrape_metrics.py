@@ -0,0 +1,155 @@
+# In-process counters, gauges and histograms for the scrape hot paths, served as Prometheus text on GET /metrics.
+#
+# ORCHESTRATOR.py serves them next to /snapshots (snapshot_server, port 8790). IN_PLAY.py / TODAY.PY /
+# TOMMOROW.py each run start_metrics_server() on their own port (METRICS_PORTS).
+#
+#   scrape_stage_seconds{stage, scraper}  histogram  page_load (driver.get: Chrome's navigation),
+#                                                    page_ready (waiting for the site to render markets),
+#                                                    expand, extract, serialize, write
+#   scrape_cycle_seconds                  histogram  one match cycle on its tab (both scrapers)
+#   discovery_seconds{feed}               histogram  one *_MATCHES.scrape_data pass
+#   scrape_cycles_total                   counter
+#   scrape_errors_total{stage}            counter    cycle, browser, discovery, premium
+#   driver_restarts_total{reason}         counter    unresponsive, recycled
+#   snapshot_writes_total{result}         counter    written, skipped (unchanged content)
+#   scrape_active_workers                 gauge      matches with a running worker
+#   scrape_active_browsers                gauge      tab hosts with a live Chrome
+#   driver_pool_drivers{state}            gauge      in_use, idle
+#   driver_pool_started_total             counter    Chrome instances the pool started
+#   driver_pool_discarded_total           counter    ... and quit (recycled, dead, released for good)
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import snapshot_writer
+
+METRICS_PORTS = {"IN_PLAY": 9101, "TODAY": 9102, "TOMMOROW": 9103}
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+_callbacks = {}   # (name, labels) -> (kind, fn), read at scrape time
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    key = (name, label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        histogram[bisect_left(BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+# with timed("scrape_stage_seconds", stage="extract", scraper="wickspin"): ...
+@contextmanager
+def timed(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+# A value owned by someone else (pool sizes, write counts), read when /metrics is scraped
+def register(name, kind, fn, **labels):
+    with _lock:
+        _callbacks[(name, label_key(labels))] = (kind, fn)
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def render():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        callbacks = dict(_callbacks)
+
+    families = {}  # name -> (kind, [lines])
+    for (name, labels), value in sorted(counters.items()):
+        families.setdefault(name, ("counter", []))[1].append(f"{name}{format_labels(labels)} {value}")
+    for (name, labels), (kind, fn) in sorted(callbacks.items(), key=lambda item: item[0]):
+        try:
+            value = fn()
+        except Exception:
+            continue
+        families.setdefault(name, (kind, []))[1].append(f"{name}{format_labels(labels)} {value}")
+    for (name, labels), values in sorted(histograms.items()):
+        lines = families.setdefault(name, ("histogram", []))[1]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {values[-1]:.6f}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+    out = []
+    for name in sorted(families):
+        kind, lines = families[name]
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+
+# Live sizes of a process's DriverPool and TabMultiplexer
+def track_runtime(pool, multiplexer):
+    register("scrape_active_workers", "gauge", lambda: len(multiplexer.match_ids()))
+    register("scrape_active_browsers", "gauge", lambda: sum(1 for host in list(multiplexer.hosts) if host.driver is not None))
+    register("driver_pool_drivers", "gauge", lambda: pool.created - pool.recycled - len(pool.idle), state="in_use")
+    register("driver_pool_drivers", "gauge", lambda: len(pool.idle), state="idle")
+    register("driver_pool_started_total", "counter", lambda: pool.created)
+    register("driver_pool_discarded_total", "counter", lambda: pool.recycled)
+
+
+register("snapshot_writes_total", "counter", lambda: snapshot_writer.write_counts["written"], result="written")
+register("snapshot_writes_total", "counter", lambda: snapshot_writer.write_counts["skipped"], result="skipped")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Prometheus scrapes every few seconds; keep them out of the console
+
+
+# Standalone /metrics for processes that don't run the snapshot server
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"[{now()}] 📈 Metrics on http://{host}:{port}/metrics")
+    return server
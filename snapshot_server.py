@@ -0,0 +1,277 @@
+# Local read API over the latest snapshot of every match, so consumers stop scanning *_Scrapped/ themselves.
+#
+#   GET /snapshots                          every match: {feed: {sport: {match: {kind: {seq, data}}}}}
+#   GET /snapshots/<feed>                   e.g. /snapshots/IN_PLAY
+#   GET /snapshots/<feed>/<sport>           e.g. /snapshots/IN_PLAY/Cricket
+#   GET /snapshots/<feed>/<sport>/<match>   {"wickspin": {seq, data}, "premium": {seq, data}}
+#   WS  /stream[?feed=..&sport=..&match=..] current snapshots first, then every publication as it happens:
+#                                           {"feed", "sport", "match", "kind", "seq", "data"}
+#   WS  /events[?feed=..&sport=..&match=..&section=..&type=..]
+#                                           only what changed, one event per field (see odds_events.py)
+#   GET /metrics                            this process's scrape metrics, Prometheus text (see scrape_metrics.py)
+#
+# ORCHESTRATOR.py runs it in-process, fed straight by snapshot_writer; a retired match is dropped when its
+# outputs are released. Next to the separate IN_PLAY.py / TODAY.PY / TOMMOROW.py processes, run it
+# standalone; it follows the .seq sidecars:
+#
+#   python snapshot_server.py --port 8790
+
+import argparse
+import asyncio
+import threading
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import orjson
+
+import snapshot_writer
+import scrape_metrics
+from odds_events import EventBus, diff_snapshots
+from websocket_lite import read_request, is_upgrade, accept, send_text, wait_closed
+
+SNAPSHOT_SUFFIXES = {"_wickspin.json": "wickspin", "_premium.json": "premium"}
+SCRAPPED_GLOB = "*_Scrapped/*/*.json.seq"
+SCAN_INTERVAL = 0.25  # standalone mode: how often the .seq sidecars are checked
+MAX_STREAM_BACKLOG = 1000  # /stream messages queued per client before it's resynced from the current snapshots
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+# IN_PLAY_Scrapped/Cricket/A vs B_wickspin.json -> ("IN_PLAY", "Cricket", "A vs B", "wickspin")
+def snapshot_key(path):
+    path = Path(path)
+    feed_dir = path.parent.parent.name
+    if not feed_dir.endswith("_Scrapped"):
+        return None
+    for suffix, kind in SNAPSHOT_SUFFIXES.items():
+        if path.name.endswith(suffix):
+            return feed_dir[:-len("_Scrapped")], path.parent.name, path.name[:-len(suffix)], kind
+    return None
+
+
+class SnapshotServer:
+    def __init__(self, root="."):
+        self.root = Path(root)
+        self.snapshots = {}  # (feed, sport, match) -> {kind: {"seq", "data"}}
+        self.clients = {}    # websocket writer -> (filters, queue of encoded messages)
+        self.seen_seqs = {}  # standalone mode: .seq path -> last seq loaded
+        self.events = EventBus()  # change events between consecutive snapshots of a match
+        self.loop = None
+
+    # Thread-safe entry point: snapshot_writer listener signature (path, seq, data)
+    def update(self, path, seq, data):
+        key = snapshot_key(path)
+        if key is None:
+            return
+        if self.loop is None:
+            self.apply(key, seq, data)
+        else:
+            self.loop.call_soon_threadsafe(self.apply, key, seq, data)
+
+    # Thread-safe entry point: snapshot_writer forget listener, called when a match is retired
+    def forget(self, path):
+        key = snapshot_key(path)
+        if key is None:
+            return
+        if self.loop is None:
+            self.drop(key)
+        else:
+            self.loop.call_soon_threadsafe(self.drop, key)
+
+    def drop(self, key):
+        feed, sport, match, kind = key
+        entry = self.snapshots.get((feed, sport, match))
+        if entry is None:
+            return
+        entry.pop(kind, None)
+        if not entry:
+            del self.snapshots[(feed, sport, match)]
+
+    def apply(self, key, seq, data):
+        feed, sport, match, kind = key
+        entry = self.snapshots.setdefault((feed, sport, match), {})
+        previous = entry.get(kind)
+        if previous is not None and previous["seq"] >= seq:
+            return
+        entry[kind] = {"seq": seq, "data": data}
+
+        if previous is not None:
+            events = diff_snapshots(previous["data"], data)
+            for event in events:
+                event.update(feed=feed, sport=sport, match=match, kind=kind, seq=seq)
+            self.events.publish(events)
+
+        message = None
+        for filters, queue in self.clients.values():
+            if matches(filters, feed, sport, match):
+                message = message or orjson.dumps({"feed": feed, "sport": sport, "match": match,
+                                                   "kind": kind, "seq": seq, "data": data})
+                if queue.full():
+                    # A client this far behind only needs the latest of each snapshot, which already includes this one
+                    while not queue.empty():
+                        queue.get_nowait()
+                    self.fill(queue, filters)
+                else:
+                    queue.put_nowait(message)
+
+    # Queues the current snapshot of every match the filters select, as far as the queue has room
+    def fill(self, queue, filters):
+        for (feed, sport, match), kinds in list(self.snapshots.items()):
+            if matches(filters, feed, sport, match):
+                for kind, entry in kinds.items():
+                    if queue.full():
+                        return
+                    queue.put_nowait(orjson.dumps({"feed": feed, "sport": sport, "match": match, "kind": kind, **entry}))
+
+    # One pass over the *_Scrapped folders; loads every snapshot whose sequence moved since the last pass
+    def scan(self):
+        updates = []
+        for seq_file in self.root.glob(SCRAPPED_GLOB):
+            path = str(seq_file)[:-len(".seq")]
+            seq = snapshot_writer.read_seq(path)
+            if seq <= self.seen_seqs.get(str(seq_file), 0) or snapshot_key(path) is None:
+                continue
+            try:
+                seq, data = snapshot_writer.read_snapshot(path)
+            except (OSError, ValueError):
+                continue
+            self.seen_seqs[str(seq_file)] = seq
+            updates.append((path, seq, data))
+        return updates
+
+    async def follow_files(self):
+        while True:
+            for path, seq, data in await self.loop.run_in_executor(None, self.scan):
+                self.apply(snapshot_key(path), seq, data)
+            await asyncio.sleep(SCAN_INTERVAL)
+
+    def view(self, feed=None, sport=None, match=None):
+        if match is not None:
+            return self.snapshots.get((feed, sport, match))
+        tree = {}
+        for (entry_feed, entry_sport, entry_match), kinds in self.snapshots.items():
+            if matches({"feed": feed, "sport": sport}, entry_feed, entry_sport, entry_match):
+                tree.setdefault(entry_feed, {}).setdefault(entry_sport, {})[entry_match] = kinds
+        if sport is not None:
+            return tree.get(feed, {}).get(sport, {})
+        if feed is not None:
+            return tree.get(feed, {})
+        return tree
+
+    async def stream(self, reader, writer, filters):
+        queue = asyncio.Queue(MAX_STREAM_BACKLOG)
+        self.fill(queue, filters)
+        self.clients[writer] = (filters, queue)
+
+        async def pump():
+            while True:
+                await send_text(writer, await queue.get())
+
+        sender = asyncio.ensure_future(pump())
+        try:
+            await wait_closed(reader, writer)
+        finally:
+            sender.cancel()
+            self.clients.pop(writer, None)
+
+    async def stream_events(self, reader, writer, filters):
+        subscription = self.events.subscribe(filters)
+
+        async def pump():
+            while True:
+                await send_text(writer, orjson.dumps(await subscription.get()))
+
+        sender = asyncio.ensure_future(pump())
+        try:
+            await wait_closed(reader, writer)
+        finally:
+            sender.cancel()
+            subscription.close()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                method, target, headers = await read_request(reader)
+                if method is None:
+                    break
+                parts = urlsplit(target)
+                segments = [unquote(segment) for segment in parts.path.strip("/").split("/") if segment]
+
+                if segments == ["stream"] and is_upgrade(headers):
+                    query = parse_qs(parts.query)
+                    filters = {name: query[name][0] for name in ("feed", "sport", "match") if name in query}
+                    await accept(writer, headers)
+                    await self.stream(reader, writer, filters)
+                    break
+                if segments == ["events"] and is_upgrade(headers):
+                    query = parse_qs(parts.query)
+                    filters = {name: query[name][0] for name in ("feed", "sport", "match", "section", "type") if name in query}
+                    await accept(writer, headers)
+                    await self.stream_events(reader, writer, filters)
+                    break
+
+                if method == "GET" and segments == ["metrics"]:
+                    respond(writer, "200 OK", scrape_metrics.render().encode(), scrape_metrics.CONTENT_TYPE)
+                    await writer.drain()
+                    continue
+
+                body = None
+                if method == "GET" and segments and segments[0] == "snapshots" and len(segments) <= 4:
+                    body = self.view(*segments[1:])
+                if body is None:
+                    respond(writer, "404 Not Found", b'{"error": "not found"}')
+                else:
+                    respond(writer, "200 OK", orjson.dumps(body))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8790, follow=False):
+        self.loop = asyncio.get_running_loop()
+        for path, seq, data in await self.loop.run_in_executor(None, self.scan):
+            self.apply(snapshot_key(path), seq, data)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"[{now()}] 📡 Snapshot server on http://{host}:{port}/snapshots ({len(self.snapshots)} matches loaded)")
+        async with server:
+            if follow:
+                await asyncio.gather(server.serve_forever(), self.follow_files())
+            else:
+                await server.serve_forever()
+
+
+def matches(filters, feed, sport, match):
+    return all(filters.get(name) in (None, value) for name, value in (("feed", feed), ("sport", sport), ("match", match)))
+
+
+def respond(writer, status, body, content_type="application/json"):
+    writer.write(
+        f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+    )
+
+
+# In-process mode: every snapshot this process publishes goes straight to the server's memory
+def start_in_background(host="127.0.0.1", port=8790):
+    server = SnapshotServer()
+    snapshot_writer.add_listener(server.update)
+    snapshot_writer.add_forget_listener(server.forget)
+    thread = threading.Thread(target=lambda: asyncio.run(server.serve(host, port)), name="snapshot-server", daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the latest odds snapshots over HTTP and WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--root", default=".", help="folder holding the *_Scrapped directories")
+    args = parser.parse_args()
+    try:
+        asyncio.run(SnapshotServer(args.root).serve(args.host, args.port, follow=True))
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting snapshot server.")
@@ -0,0 +1,127 @@
+# Publication of the "latest" snapshot files readers poll (IN_PLAY_Scrapped/<sport>/<match>_*.json).
+#
+# - unchanged snapshots (ignoring volatile fields) are not rewritten at all
+# - changed ones are written to a temp file in the same folder and renamed over the old one,
+#   so a reader opening the path always gets a complete file, old or new, never a half-written one
+# - every publication bumps a sequence number in <file>.seq, so readers can check
+#   changed_since(path, seq) with one tiny read instead of re-parsing the snapshot
+
+import hashlib
+import os
+import threading
+
+import orjson
+
+# Fields that change on every cycle without the odds changing; left out of the hash
+VOLATILE_FIELDS = ("timestamp",)
+
+_last_hashes = {}  # output path -> hash of the last snapshot written there
+_sequences = {}    # output path -> sequence number of the last publication
+_listeners = []    # fn(path, seq, data), called after every publication (e.g. the snapshot server)
+_forget_listeners = []  # fn(path), called when a path's match is retired
+_lock = threading.Lock()
+write_counts = {"written": 0, "skipped": 0}
+
+
+def snapshot_hash(data, volatile=VOLATILE_FIELDS):
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key not in volatile}
+    return hashlib.blake2b(orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
+
+def seq_path(path):
+    return f"{path}.seq"
+
+
+def read_seq(path):
+    try:
+        with open(seq_path(path), "rb") as f:
+            return int(f.read() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+# write(data, temp_path) fills a temp file next to `path`; it then replaces `path` in one rename
+def publish(path, data, write):
+    path = str(path)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(data, temp)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+    with _lock:
+        seq = _sequences.get(path)
+        seq = _sequences[path] = (read_seq(path) if seq is None else seq) + 1
+    temp_seq = f"{seq_path(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_seq, "wb") as f:
+        f.write(str(seq).encode())
+    os.replace(temp_seq, seq_path(path))
+    return seq
+
+
+# Publishes the snapshot only if it differs from the last one written to that path
+# (or the file has gone). Returns True if it wrote.
+def write_if_changed(path, data, write, volatile=VOLATILE_FIELDS):
+    path = str(path)
+    digest = snapshot_hash(data, volatile)
+    with _lock:
+        if _last_hashes.get(path) == digest and os.path.exists(path):
+            write_counts["skipped"] += 1
+            return False
+
+    seq = publish(path, data, write)
+    with _lock:
+        _last_hashes[path] = digest
+        write_counts["written"] += 1
+    # Listeners keep what they're given; the scraper goes on mutating its own dict
+    snapshot = orjson.loads(orjson.dumps(data)) if _listeners else None
+    for listener in list(_listeners):
+        try:
+            listener(path, seq, snapshot)
+        except Exception as e:
+            print(f"⚠️ Snapshot listener failed for {path}: {e}")
+    return True
+
+
+def add_listener(listener):
+    _listeners.append(listener)
+
+
+def add_forget_listener(listener):
+    _forget_listeners.append(listener)
+
+
+def forget(path):
+    with _lock:
+        _last_hashes.pop(str(path), None)
+        _sequences.pop(str(path), None)
+    for listener in list(_forget_listeners):
+        try:
+            listener(str(path))
+        except Exception as e:
+            print(f"⚠️ Snapshot forget listener failed for {path}: {e}")
+
+
+# --- Reader side -----------------------------------------------------------
+
+# New sequence number if the snapshot was republished after `seq`, else None
+def changed_since(path, seq):
+    current = read_seq(path)
+    return current if current > seq else None
+
+
+# (seq, data) of a complete snapshot; seq is re-checked so it belongs to the data that was read
+def read_snapshot(path, retries=3):
+    for _ in range(retries):
+        seq = read_seq(path)
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        if read_seq(path) == seq:
+            return seq, data
+    return read_seq(path), data
@@ -0,0 +1,250 @@
+import threading
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from adaptive_polling import AdaptivePacer
+from match_lifecycle import release_outputs
+from scrape_metrics import inc, timed
+
+
+def now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+MAX_IDLE_SLEEP = 0.5  # scheduler wakes at least this often to pick up new jobs and tier changes
+
+
+# A match's scrape cycle, its polling pace (tier interval, backed off while quiet) and when it is next due
+class TabJob:
+    def __init__(self, cycle, interval):
+        self.cycle = cycle
+        self.pacer = AdaptivePacer(interval)
+        self.next_due = 0.0
+
+    @property
+    def interval(self):
+        return self.pacer.interval
+
+
+# One Chrome instance hosting many match pages as tabs, driven by a single scheduler thread
+# (a WebDriver session only ever runs one command at a time, so one thread per browser).
+class BrowserHost:
+    def __init__(self, name, pool, health_check_cycles=500):
+        self.name = name
+        self.pool = pool
+        self.health_check_cycles = health_check_cycles
+        self.cycles_since_check = 0
+        self.lease = None
+        self.driver = None
+        self.jobs = {}      # match_id -> TabJob
+        self.handles = {}   # match_id -> window handle of its tab
+        self.spare_handles = []
+        self.retired = []   # (match id, job) whose tab and outputs the scheduler thread still has to release
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, match_id, cycle, interval):
+        with self.lock:
+            self.jobs[match_id] = TabJob(cycle, interval)
+
+    # Returns True if the job existed and its tier interval actually changed
+    def set_interval(self, match_id, interval):
+        with self.lock:
+            job = self.jobs.get(match_id)
+            if job is None or job.pacer.base_interval == interval:
+                return False
+            job.pacer.rebase(interval)
+            job.next_due = min(job.next_due, time.time() + interval)
+            return True
+
+    # Drops the job; its tab is blanked and its outputs released by the scheduler thread (WebDriver calls
+    # stay on one thread, and a cycle of the job still running there can't re-create what was released)
+    def remove(self, match_id):
+        with self.lock:
+            job = self.jobs.pop(match_id, None)
+            if job is not None:
+                self.retired.append((match_id, job))
+            return job
+
+    def start(self):
+        self.thread.start()
+
+    def open_browser(self):
+        self.lease = self.pool.lease()
+        self.driver = self.lease.driver
+        self.handles = {}
+        self.spare_handles = [self.driver.current_window_handle]  # reuse the blank startup tab
+        print(f"[{now()}] 🌐 {self.name}: browser started")
+
+    def quit_browser(self):
+        self.pool.release(self.lease, discard=True)
+        self.lease = None
+        self.driver = None
+
+    def tab_for(self, match_id):
+        handle = self.handles.get(match_id)
+        if handle is None:
+            if self.spare_handles:
+                handle = self.spare_handles.pop()
+                self.driver.switch_to.window(handle)
+            else:
+                self.driver.switch_to.new_window("tab")
+                handle = self.driver.current_window_handle
+            self.handles[match_id] = handle
+        else:
+            self.driver.switch_to.window(handle)
+        return handle
+
+    # Retired tabs go back to about:blank as spares; a browser left with no jobs is quit
+    def retire_tabs(self, retired, jobs_left):
+        if self.driver is None:
+            return
+        if not jobs_left:
+            print(f"[{now()}] 💤 {self.name}: no matches left, closing browser")
+            self.quit_browser()
+            return
+        for match_id in retired:
+            handle = self.handles.pop(match_id, None)
+            if handle is None:
+                continue
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.get("about:blank")
+                self.spare_handles.append(handle)
+            except WebDriverException:
+                pass
+
+    # Run every job that is due, then sleep until the next one (each tier keeps its own pace)
+    def run(self):
+        while True:
+            started = time.time()
+            with self.lock:
+                jobs = list(self.jobs.items())
+                retired, self.retired = self.retired, []
+            if retired:
+                self.retire_tabs([match_id for match_id, _ in retired], bool(jobs))
+                # Past the job's last cycle: it ran on this thread before this pass started
+                for _, job in retired:
+                    release_outputs(getattr(job.cycle, "output_files", ()))
+            due = sorted(((match_id, job) for match_id, job in jobs if job.next_due <= started),
+                         key=lambda item: item[1].next_due)
+
+            if due and self.driver is None:
+                try:
+                    self.open_browser()
+                except Exception as e:
+                    print(f"[{now()}] ❌ {self.name}: could not start browser: {e}")
+                    time.sleep(5)
+                    continue
+
+            for match_id, job in due:
+                # Retired since `jobs` was taken: running it now would recreate the caches about to be released
+                with self.lock:
+                    if self.jobs.get(match_id) is not job:
+                        continue
+                cycle_started = time.time()
+                job.next_due = cycle_started + job.interval
+                try:
+                    self.tab_for(match_id)
+                    inc("scrape_cycles_total")
+                    with timed("scrape_cycle_seconds"):
+                        result = job.cycle(self.driver)
+                    if result is not None:
+                        previous = job.interval
+                        job.next_due = cycle_started + job.pacer.observe(result)
+                        if job.interval != previous:
+                            arrow = "🐢" if job.interval > previous else "⚡"
+                            print(f"[{now()}] {arrow} {self.name}: {match_id} now every {job.interval:g}s")
+                except WebDriverException as e:
+                    print(f"[{now()}] ❌ {self.name}: error on {match_id}: {e.msg}")
+                    inc("scrape_errors_total", stage="browser")
+                    if not self.is_alive():
+                        print(f"[{now()}] 🔁 {self.name}: browser unresponsive, restarting with {len(jobs)} tabs")
+                        inc("driver_restarts_total", reason="unresponsive")
+                        self.quit_browser()
+                        break
+                    self.close_tab(match_id)  # tab may have crashed; reopen it next cycle
+                except Exception as e:
+                    print(f"[{now()}] ❌ {self.name}: error on {match_id}: {e}")
+                    inc("scrape_errors_total", stage="cycle")
+
+            if self.lease is not None and due:
+                self.lease.cycles += len(due)
+                self.cycles_since_check += len(due)
+                if self.cycles_since_check >= self.health_check_cycles:
+                    self.cycles_since_check = 0
+                    if self.pool.should_recycle(self.lease):
+                        print(f"[{now()}] ♻️ {self.name}: recycling browser, {len(jobs)} tabs will reopen")
+                        inc("driver_restarts_total", reason="recycled")
+                        self.quit_browser()
+
+            next_due = min((job.next_due for _, job in jobs), default=started + MAX_IDLE_SLEEP)
+            time.sleep(min(MAX_IDLE_SLEEP, max(0.0, next_due - time.time())))
+
+    def close_tab(self, match_id):
+        handle = self.handles.pop(match_id, None)
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception:
+            pass
+
+    def is_alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+
+# Spreads match jobs over a small set of BrowserHosts instead of one Chrome per match.
+# Browsers are leased from a DriverPool, which caps and recycles them.
+class TabMultiplexer:
+    def __init__(self, pool, tabs_per_browser=10, max_browsers=5, default_interval=0.5):
+        self.pool = pool
+        self.tabs_per_browser = tabs_per_browser
+        self.max_browsers = max_browsers
+        self.default_interval = default_interval
+        self.hosts = []
+        self.lock = threading.Lock()
+
+    def add_match(self, match_id, cycle, interval=None):
+        interval = self.default_interval if interval is None else interval
+        with self.lock:
+            host = min(self.hosts, key=len, default=None)
+            if host is None or (len(host) >= self.tabs_per_browser and len(self.hosts) < self.max_browsers):
+                host = BrowserHost(f"browser-{len(self.hosts) + 1}", self.pool)
+                self.hosts.append(host)
+                host.start()
+            host.add(match_id, cycle, interval)
+            print(f"[{now()}] 🗂️ {match_id} → {host.name} ({len(host)} tabs, every {interval:g}s)")
+
+    def set_interval(self, match_id, interval):
+        with self.lock:
+            hosts = list(self.hosts)
+        return any(host.set_interval(match_id, interval) for host in hosts)
+
+    # Stops scraping a match and frees its tab; returns its TabJob, or None if it wasn't running
+    def remove_match(self, match_id):
+        with self.lock:
+            hosts = list(self.hosts)
+        for host in hosts:
+            job = host.remove(match_id)
+            if job is not None:
+                print(f"[{now()}] 🗑️ {match_id} removed from {host.name} ({len(host)} tabs left)")
+                return job
+        return None
+
+    def match_ids(self):
+        with self.lock:
+            hosts = list(self.hosts)
+        ids = set()
+        for host in hosts:
+            with host.lock:
+                ids.update(host.jobs)
+        return ids
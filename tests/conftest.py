@@ -0,0 +1,36 @@
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "EXTRA"))
+
+import fake_feed_server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Base URL of an EXTRA/fake_feed_server.py running in a background thread
+@pytest.fixture(scope="session")
+def fake_feed():
+    port = free_port()
+    thread = threading.Thread(target=lambda: asyncio.run(fake_feed_server.serve("127.0.0.1", port, 0.05)), daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("fake feed server did not start")
@@ -0,0 +1,64 @@
+import asyncio
+
+import orjson
+
+from http_replay import KeepAliveClient, ReplayPoller
+
+
+def test_replay_polls_the_feed_over_one_connection(fake_feed, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    endpoint = {"url": f"{fake_feed}/api/markets/1", "kind": "wickspin", "output_file": str(tmp_path / "A v B_wickspin.json")}
+    premium = {**endpoint, "kind": "premium", "output_file": str(tmp_path / "A v B_premium.json")}
+    poller = ReplayPoller([endpoint, premium])
+
+    async def poll():
+        for _ in range(3):
+            for spec in (endpoint, premium):
+                status, body = await poller.client.get(spec["url"])
+                assert status == 200 and poller.apply(spec, orjson.loads(body))
+        await poller.client.close()
+
+    asyncio.run(poll())
+    assert poller.client.requests == 6 and poller.client.connections_opened == 1
+    wickspin = orjson.loads((tmp_path / "A v B_wickspin.json").read_bytes())
+    assert [row["team"] for row in wickspin["exchange_odds"]] == ["Home XI", "Away XI"]
+    assert len(wickspin["fancy_markets"]) == 3
+    markets = orjson.loads((tmp_path / "A v B_premium.json").read_bytes())["markets"]
+    assert [market["market"] for market in markets] == ["Match Result", "Total Goals Over/Under 2.5"]
+
+
+def test_a_poll_replaces_the_section(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    endpoint = {"url": "http://unused", "kind": "premium", "output_file": str(tmp_path / "A v B_premium.json")}
+    poller = ReplayPoller([endpoint])
+    market = lambda name: {"marketName": name, "status": "ACTIVE", "selections": [{"name": "Over", "odds": 1.9}]}
+
+    poller.apply(endpoint, {"markets": [market("Match Result"), market("Total Goals")]})
+    poller.apply(endpoint, {"markets": [market("Total Goals")]})
+    assert [m["market"] for m in poller.snapshots[endpoint["output_file"]]["markets"]] == ["Total Goals"]
+
+
+def test_bodyless_responses_keep_the_connection():
+    responses = [b"HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 204 No Content\r\n\r\n",
+                 b"HTTP/1.1 304 Not Modified\r\nContent-Length: 12\r\n\r\n",
+                 b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}"]
+
+    async def handle(reader, writer):
+        for response in responses:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(response)
+            await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        client = KeepAliveClient(timeout=2)
+        results = [await client.get(url) for _ in responses]
+        await client.close()
+        server.close()
+        return results, client.connections_opened
+
+    results, opened = asyncio.run(run())
+    assert results == [(204, b""), (304, b""), (200, b"{}")]
+    assert opened == 1
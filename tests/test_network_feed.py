@@ -0,0 +1,88 @@
+import itertools
+import json
+import urllib.request
+
+import fake_feed_server
+from network_feed import capture_sections, merge_sections
+
+_request_ids = itertools.count(1)
+
+
+# Stands in for Chrome: the test queues performance-log entries for XHR responses of the fake feed,
+# and Network.getResponseBody fetches the real body from the server
+class FakeDriver:
+    current_window_handle = "CDwindow-TAB1"
+
+    def __init__(self):
+        self.log = []
+        self.urls = {}
+
+    def get_log(self, kind):
+        entries, self.log = self.log, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getResponseBody":
+            with urllib.request.urlopen(self.urls[params["requestId"]]) as response:
+                return {"body": response.read().decode(), "base64Encoded": False}
+        return {}
+
+    def event(self, method, params, ts):
+        self.log.append({"timestamp": ts, "message": json.dumps({"webview": "TAB1", "message": {"method": method, "params": params}})})
+
+    def xhr(self, url, ts=1000):
+        request_id = str(next(_request_ids))
+        self.urls[request_id] = url
+        self.event("Network.responseReceived", {"requestId": request_id, "type": "XHR",
+                                                "response": {"url": url, "mimeType": "application/json"}}, ts)
+        self.event("Network.loadingFinished", {"requestId": request_id}, ts)
+
+
+def test_every_consumer_gets_the_tab_feed(fake_feed):
+    driver = FakeDriver()
+    capture_sections(driver, "wickspin")
+    capture_sections(driver, "premium")
+    driver.xhr(f"{fake_feed}/api/markets/1")
+
+    wickspin, ts, unrecognised = capture_sections(driver, "wickspin")
+    premium, _, _ = capture_sections(driver, "premium")
+
+    assert unrecognised == 0 and ts == 1000
+    assert {"exchange_odds", "fancy_markets", "markets"} <= set(wickspin)
+    assert [row["team"] for row in wickspin["exchange_odds"]] == ["Home XI", "Away XI"]
+    assert premium["markets"] == wickspin["markets"]
+    assert capture_sections(driver, "premium")[0] == {}
+
+
+def test_feed_updates_merge_into_the_snapshot(fake_feed):
+    driver = FakeDriver()
+    capture_sections(driver, "wickspin")
+    snapshot = {}
+    for ts in (1000, 2000):
+        driver.xhr(f"{fake_feed}/api/markets/1", ts)
+        sections, latest_ts, _ = capture_sections(driver, "wickspin")
+        merge_sections(snapshot, sections)
+        assert latest_ts == ts
+
+    assert [row["team"] for row in snapshot["exchange_odds"]] == ["Home XI", "Away XI"]
+    assert [row["title"] for row in snapshot["fancy_markets"]] == ["6 over runs", "10 over runs", "Fall of 1st wkt"]
+    assert [market["market"] for market in snapshot["markets"]] == ["Match Result", "Total Goals Over/Under 2.5"]
+
+
+def test_websocket_frames_map_to_sections():
+    market = fake_feed_server.FakeMarket()
+    driver = FakeDriver()
+    capture_sections(driver, "wickspin")
+    frames = [json.dumps(market.runners_payload()),
+              "42" + json.dumps(["fancy", market.fancy_payload()]),  # socket.io event frame
+              json.dumps(market.markets_payload()),
+              "3"]  # socket.io pong: not JSON once the digits go, ignored
+    for ts, frame in enumerate(frames, 1000):
+        driver.event("Network.webSocketFrameReceived", {"requestId": "ws", "response": {"payloadData": frame}}, ts)
+
+    sections, ts, unrecognised = capture_sections(driver, "wickspin")
+
+    assert unrecognised == 0 and ts == 1002
+    assert [row["team"] for row in sections["exchange_odds"]] == ["Home XI", "Away XI"]
+    assert [row["title"] for row in sections["fancy_markets"]] == ["6 over runs", "10 over runs", "Fall of 1st wkt"]
+    assert [market["market"] for market in sections["markets"]] == ["Match Result", "Total Goals Over/Under 2.5"]
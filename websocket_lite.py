@@ -0,0 +1,90 @@
+import asyncio
+import base64
+import hashlib
+import struct
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+# Minimal HTTP/1.1 request head parser for the asyncio servers: (method, path, headers)
+async def read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None, None, {}
+    method, path, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+def is_upgrade(headers):
+    return headers.get("upgrade", "").lower() == "websocket" and "sec-websocket-key" in headers
+
+
+async def accept(writer, headers):
+    digest = hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()
+    writer.write(
+        b"HTTP/1.1 101 Switching Protocols\r\n"
+        b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+        b"Sec-WebSocket-Accept: " + base64.b64encode(digest) + b"\r\n\r\n"
+    )
+    await writer.drain()
+
+
+def encode_frame(payload, opcode=OP_TEXT):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    if length < 126:
+        head = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return head + payload
+
+
+async def send_text(writer, text):
+    writer.write(encode_frame(text))
+    await writer.drain()
+
+
+# Reads one (unfragmented) client frame: (opcode, payload bytes)
+async def recv_frame(reader):
+    b1, b2 = await reader.readexactly(2)
+    length = b2 & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if b2 & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return b1 & 0x0F, payload
+
+
+# Answers pings and returns once the client closes or disconnects
+async def wait_closed(reader, writer):
+    try:
+        while True:
+            opcode, payload = await recv_frame(reader)
+            if opcode == OP_CLOSE:
+                writer.write(encode_frame(b"", OP_CLOSE))
+                await writer.drain()
+                return
+            if opcode == OP_PING:
+                writer.write(encode_frame(payload, OP_PONG))
+                await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return